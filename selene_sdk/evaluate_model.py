@@ -8,7 +8,6 @@ import warnings
 import numpy as np
 import torch
 import torch.nn as nn
-from torch.autograd import Variable
 
 from .sequences import Genome
 from .utils import _is_lua_trained_model
@@ -208,18 +207,21 @@ class EvaluateModel(object):
 
         """
         batch_losses = []
-        all_predictions = []
+        # predictions are written into a single buffer on the model's
+        # device and copied to the host once, after the last batch
+        n_examples = sum(inputs.shape[0] for (inputs, _) in self._test_data)
+        all_predictions = None
+        offset = 0
         for (inputs, targets) in self._test_data:
-            inputs = torch.Tensor(inputs)
-            targets = torch.Tensor(targets[:, self._use_ixs])
+            inputs = torch.from_numpy(
+                np.ascontiguousarray(inputs, dtype=np.float32))
+            targets = torch.from_numpy(np.ascontiguousarray(
+                targets[:, self._use_ixs], dtype=np.float32))
 
             if self.use_cuda:
                 inputs = inputs.cuda()
                 targets = targets.cuda()
             with torch.no_grad():
-                inputs = Variable(inputs)
-                targets = Variable(targets)
-
                 predictions = None
                 if _is_lua_trained_model(self.model):
                     predictions = self.model.forward(
@@ -230,9 +232,17 @@ class EvaluateModel(object):
                 predictions = predictions[:, self._use_ixs]
                 loss = self.criterion(predictions, targets)
 
-                all_predictions.append(predictions.data.cpu().numpy())
-                batch_losses.append(loss.item())
-        all_predictions = np.vstack(all_predictions)
+                if all_predictions is None:
+                    all_predictions = torch.empty(
+                        (n_examples, *predictions.shape[1:]),
+                        dtype=predictions.dtype,
+                        device=predictions.device)
+                n_batch = predictions.shape[0]
+                all_predictions[offset:offset + n_batch] = predictions
+                offset += n_batch
+
+                batch_losses.append(loss.detach())
+        all_predictions = all_predictions.cpu().numpy()
 
         average_scores = self._metrics.update(
             all_predictions, self._all_test_targets)
@@ -248,7 +258,7 @@ class EvaluateModel(object):
             os.path.join(self.output_dir, "test_targets.npz"),
             data=self._all_test_targets)
 
-        loss = np.average(batch_losses)
+        loss = torch.stack(batch_losses).mean().item()
         logger.info("test loss: {0}".format(loss))
         for name, score in average_scores.items():
             logger.info("test {0}: {1}".format(name, score))
@@ -5,7 +5,6 @@ import math
 
 import numpy as np
 import torch
-from torch.autograd import Variable
 
 from ..utils import _is_lua_trained_model
 
@@ -29,10 +28,7 @@ def get_reverse_complement(allele, complementary_base_dict):
     """
     if allele == '*' or allele == '-' or len(allele) == 0:
         return '*'
-    a_complement = []
-    for a in allele:
-        a_complement.append(complementary_base_dict[a])
-    return ''.join(list(reversed(a_complement)))
+    return allele[::-1].translate(str.maketrans(complementary_base_dict))
 
 
 def get_reverse_complement_encoding(allele_encoding,
@@ -86,12 +82,11 @@ def predict(model, batch_sequences, use_cuda=False):
         is the number of features (classes) the model predicts.
 
     """
-    inputs = torch.Tensor(batch_sequences)
+    inputs = torch.from_numpy(
+        np.ascontiguousarray(batch_sequences, dtype=np.float32))
     if use_cuda:
         inputs = inputs.cuda()
     with torch.no_grad():
-        inputs = Variable(inputs)
-
         if _is_lua_trained_model(model):
             outputs = model.forward(
                 inputs.transpose(1, 2).contiguous().unsqueeze_(2))
@@ -100,6 +95,47 @@ def predict(model, batch_sequences, use_cuda=False):
         return outputs.data.cpu().numpy()
 
 
+def trace_model(model, batch_size, sequence_length, n_bases, use_cuda=False):
+    """
+    Compiles a model with `torch.jit.trace`, so that predictions are
+    made without the Python overhead of `torch.nn.Module` calls.
+
+    Parameters
+    ----------
+    model : torch.nn.Module
+        The model, on mode `eval`. It must be on the GPU already if
+        `use_cuda` is `True`.
+    batch_size : int
+        The batch size of the example input used to trace the model.
+    sequence_length : int
+        The length of the sequences the model takes as input.
+    n_bases : int
+        The size of the sequence type's alphabet.
+    use_cuda : bool, optional
+        Default is `False`. Specifies whether CUDA-enabled GPUs are available
+        for torch to use.
+
+    Returns
+    -------
+    torch.jit.ScriptModule
+        The traced model, which can be passed to `predict` in place of
+        `model`.
+
+    """
+    from_lua = _is_lua_trained_model(model)
+    example_inputs = torch.zeros(batch_size, n_bases, sequence_length)
+    if from_lua:
+        example_inputs = example_inputs.unsqueeze_(2)
+    if use_cuda:
+        example_inputs = example_inputs.cuda()
+    with torch.no_grad():
+        traced_model = torch.jit.trace(model, example_inputs)
+    # the traced model no longer contains the original submodules, so
+    # the input format is recorded for `_is_lua_trained_model`
+    traced_model.from_lua = from_lua
+    return traced_model
+
+
 def _pad_sequence(sequence, to_length, unknown_base):
     diff = (to_length - len(sequence)) / 2
     pad_l = int(np.floor(diff))
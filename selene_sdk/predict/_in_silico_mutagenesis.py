@@ -88,23 +88,125 @@ def in_silico_mutagenesis_sequences(sequence,
                           "{0} currently, but {1} bases must be mutated at a "
                           "time").format(end_position - start_position, mutate_n_bases))
 
-    sequence_alts = []
-    for index, ref in enumerate(sequence):
-        alts = []
-        for base in reference_sequence.BASES_ARR:
-            if base == ref:
-                continue
-            alts.append(base)
-        sequence_alts.append(alts)
-    all_mutated_sequences = []
-    for indices in itertools.combinations(
-            range(start_position, end_position), mutate_n_bases):
-        pos_mutations = []
-        for i in indices:
-            pos_mutations.append(sequence_alts[i])
-        for mutations in itertools.product(*pos_mutations):
-            all_mutated_sequences.append(list(zip(indices, mutations)))
-    return all_mutated_sequences
+    positions, alt_indices = _ism_mutation_arrays(
+        sequence,
+        mutate_n_bases=mutate_n_bases,
+        reference_sequence=reference_sequence,
+        start_position=start_position,
+        end_position=end_position)
+    bases_arr = reference_sequence.BASES_ARR
+    return [list(zip(pos, [bases_arr[a] for a in alts]))
+            for pos, alts in zip(positions.tolist(), alt_indices.tolist())]
+
+
+def _ism_mutation_arrays(sequence,
+                         mutate_n_bases=1,
+                         reference_sequence=Genome,
+                         start_position=0,
+                         end_position=None):
+    """
+    Array-based counterpart of `in_silico_mutagenesis_sequences`. Does
+    not validate `start_position` and `end_position`.
+
+    Parameters
+    ----------
+    sequence : str
+        A string containing the sequence we would like to mutate.
+    mutate_n_bases : int, optional
+        Default is 1. The number of base changes to make with each set of
+        mutations evaluated.
+    reference_sequence : class, optional
+        Default is `selene_sdk.sequences.Genome`. The type of sequence
+        that has been passed in.
+    start_position : int, optional
+        Default is 0. The starting position of the subsequence to be
+        mutated.
+    end_position : int or None, optional
+        Default is None. The ending position of the subsequence to be
+        mutated. If left as `None`, then `len(sequence)` will be
+        used.
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        The positions to mutate and the indices (in
+        `reference_sequence.BASES_ARR`) of the bases with which we are
+        replacing the reference bases. Both arrays have the shape
+        :math:`M \\times K`, where :math:`M` is the number of mutated
+        sequences and :math:`K` is `mutate_n_bases`. Rows are in the same
+        order as the output of `in_silico_mutagenesis_sequences`.
+
+    """
+    if end_position is None:
+        end_position = len(sequence)
+    refs = np.array(list(sequence[start_position:end_position]))
+    bases_arr = np.array(reference_sequence.BASES_ARR)
+    # `is_alt[i, j]` is True if base `j` can replace the base at
+    # position `start_position + i`
+    is_alt = refs[:, np.newaxis] != bases_arr[np.newaxis, :]
+
+    if mutate_n_bases == 1:
+        positions, alt_indices = np.nonzero(is_alt)
+        return ((positions + start_position).reshape(-1, 1),
+                alt_indices.reshape(-1, 1))
+
+    # one row per combination of `mutate_n_bases` positions, in the
+    # order of `itertools.combinations`
+    combinations = np.fromiter(
+        itertools.chain.from_iterable(
+            itertools.combinations(range(len(refs)), mutate_n_bases)),
+        dtype=np.int64).reshape(-1, mutate_n_bases)
+    n_bases = len(bases_arr)
+    # `valid[c, b_1, ..., b_K]` is True if bases `b_1, ..., b_K` can
+    # replace the bases at the positions in combination `c`
+    valid = np.ones((len(combinations),) + (n_bases,) * mutate_n_bases,
+                    dtype=bool)
+    for k in range(mutate_n_bases):
+        shape = [len(combinations)] + [1] * mutate_n_bases
+        shape[k + 1] = n_bases
+        valid &= is_alt[combinations[:, k]].reshape(shape)
+    combination_indices, base_indices = np.nonzero(
+        valid.reshape(len(combinations), -1))
+    alt_indices = np.stack(np.unravel_index(
+        base_indices, (n_bases,) * mutate_n_bases), axis=-1)
+    return (combinations[combination_indices] + start_position,
+            alt_indices)
+
+
+def _mutations_list_to_arrays(mutations_list, reference_sequence=Genome):
+    """
+    Converts the output of `in_silico_mutagenesis_sequences` to the
+    arrays returned by `_ism_mutation_arrays`.
+
+    Parameters
+    ----------
+    mutations_list : list(list(tuple))
+        The mutations to apply to a sequence. Each element is a list of
+        (`int` position, `str` base) tuples.
+    reference_sequence : class, optional
+        Default is `selene_sdk.sequences.Genome`. The type of sequence
+        that has been mutated.
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        The positions to mutate and the indices of the bases with which
+        to replace the reference bases, each of shape
+        :math:`M \\times K`.
+
+    """
+    # an empty list still gives 2-D arrays, with a single (empty)
+    # mutation column
+    n_mutations = len(mutations_list[0]) if len(mutations_list) else 1
+    positions = np.array(
+        [[pos for (pos, _) in mutation_info]
+         for mutation_info in mutations_list],
+        dtype=np.int64).reshape(-1, n_mutations)
+    alt_indices = np.array(
+        [[reference_sequence.BASE_TO_INDEX[alt] for (_, alt) in mutation_info]
+         for mutation_info in mutations_list],
+        dtype=np.int64).reshape(-1, n_mutations)
+    return positions, alt_indices
 
 
 def mutate_sequence(encoding,
@@ -143,6 +245,47 @@ def mutate_sequence(encoding,
     return mutated_seq
 
 
+def _ism_sample_ids(sequence,
+                    positions,
+                    alt_indices,
+                    reference_sequence=Genome):
+    """
+    Vectorized counterpart of `_ism_sample_id`: builds the identifiers
+    for all of the mutated sequences at once.
+
+    Parameters
+    ----------
+    sequence : str
+        The input sequence to mutate.
+    positions : numpy.ndarray
+        The :math:`M \\times K` positions mutated in each sequence, as
+        returned by `_ism_mutation_arrays`.
+    alt_indices : numpy.ndarray
+        The :math:`M \\times K` indices of the alternate bases, as
+        returned by `_ism_mutation_arrays`.
+    reference_sequence : class, optional
+        Default is `selene_sdk.sequences.Genome`. The type of sequence
+        that has been mutated.
+
+    Returns
+    -------
+    numpy.ndarray
+        An :math:`M \\times 3` array of `str`, where each row is the
+        (positions, refs, alts) identifier of a mutated sequence.
+        Multiple mutations in a sequence are delimited by ';'.
+
+    """
+    refs = np.array(list(sequence))[positions]
+    alts = np.array(reference_sequence.BASES_ARR)[alt_indices]
+    columns = [positions.astype(str), refs, alts]
+    for i, column in enumerate(columns):
+        joined = column[:, 0]
+        for k in range(1, column.shape[1]):
+            joined = np.char.add(np.char.add(joined, ';'), column[:, k])
+        columns[i] = joined
+    return np.stack(columns, axis=1)
+
+
 def _ism_sample_id(sequence, mutation_information):
     """
     TODO
@@ -68,21 +68,21 @@ def read_vcf_file(input_path,
             check_chr = False
             break
     with open(input_path, 'r') as file_handle:
-        lines = file_handle.readlines()
-        index = 0
-        for index, line in enumerate(lines):
-            if '#' not in line:
-                break
-            if "#CHROM" in line:
-                cols = line.strip().split('\t')
-                if cols[:5] != VCF_REQUIRED_COLS:
-                    raise ValueError(
-                        "First 5 columns in file {0} were {1}. "
-                        "Expected columns: {2}".format(
-                            input_path, cols[:5], VCF_REQUIRED_COLS))
-                index += 1
-                break
-        for line in lines[index:]:
+        # the file is read in a single pass, one line at a time, so
+        # that large VCF files are never held in memory in full
+        in_header = True
+        for line in file_handle:
+            if in_header and line.startswith('#'):
+                if line.startswith("#CHROM"):
+                    cols = line.strip().split('\t')
+                    if cols[:5] != VCF_REQUIRED_COLS:
+                        raise ValueError(
+                            "First 5 columns in file {0} were {1}. "
+                            "Expected columns: {2}".format(
+                                input_path, cols[:5], VCF_REQUIRED_COLS))
+                    in_header = False
+                continue
+            in_header = False
             cols = line.strip().split('\t')
             if len(cols) < 5:
                 na_rows.append(line)
@@ -192,35 +192,40 @@ def _process_alt(chrom,
             sequence)
 
     alt_encoding = reference_sequence.sequence_to_encoding(alt)
+    seq_len = len(wt_sequence)
     if ref_len == alt_len:  # substitution
-        start_pos, end_pos = _get_ref_idxs(len(wt_sequence), ref_len)
-        sequence = np.vstack([wt_sequence[:start_pos, :],
-                              alt_encoding,
-                              wt_sequence[end_pos:, :]])
+        start_pos, end_pos = _get_ref_idxs(seq_len, ref_len)
+        sequence = wt_sequence.copy()
+        sequence[start_pos:end_pos, :] = alt_encoding
         return sequence
     elif alt_len > ref_len:  # insertion
-        start_pos, end_pos = _get_ref_idxs(len(wt_sequence), ref_len)
-        sequence = np.vstack([wt_sequence[:start_pos, :],
-                              alt_encoding,
-                              wt_sequence[end_pos:, :]])
-        trunc_s = (len(sequence) - wt_sequence.shape[0]) // 2
-        trunc_e = trunc_s + wt_sequence.shape[0]
-        sequence = sequence[trunc_s:trunc_e, :]
+        start_pos, end_pos = _get_ref_idxs(seq_len, ref_len)
+        # the window of length `seq_len` centered on the reference
+        # sequence with `ref` replaced by `alt` is written directly,
+        # without building the full-length alternate sequence
+        trunc_s = (alt_len - ref_len) // 2
+        sequence = np.empty_like(wt_sequence)
+        lhs_len = max(start_pos - trunc_s, 0)
+        sequence[:lhs_len, :] = wt_sequence[trunc_s:start_pos, :]
+        alt_s = max(trunc_s - start_pos, 0)
+        alt_e = min(alt_len, seq_len + trunc_s - start_pos)
+        sequence[lhs_len:lhs_len + alt_e - alt_s, :] = \
+            alt_encoding[alt_s:alt_e, :]
+        rhs_s = lhs_len + alt_e - alt_s
+        sequence[rhs_s:, :] = wt_sequence[end_pos:end_pos + seq_len - rhs_s, :]
         return sequence
     else:  # deletion
-        lhs = reference_sequence.get_sequence_from_coords(
+        lhs = reference_sequence.get_encoding_from_coords(
             chrom,
             start - ref_len // 2 + alt_len // 2,
             pos + 1,
             pad=True)
-        rhs = reference_sequence.get_sequence_from_coords(
+        rhs = reference_sequence.get_encoding_from_coords(
             chrom,
             pos + 1 + ref_len,
             end + math.ceil(ref_len / 2.) - math.ceil(alt_len / 2.),
             pad=True)
-        sequence = lhs + alt + rhs
-        return reference_sequence.sequence_to_encoding(
-            sequence)
+        return np.concatenate([lhs, alt_encoding, rhs])
 
 
 def _handle_standard_ref(ref_encoding,
@@ -296,10 +301,14 @@ def _handle_ref_alt_predictions(model,
     None
 
     """
-    batch_ref_seqs = np.array(batch_ref_seqs)
-    batch_alt_seqs = np.array(batch_alt_seqs)
-    ref_outputs = predict(model, batch_ref_seqs, use_cuda=use_cuda)
-    alt_outputs = predict(model, batch_alt_seqs, use_cuda=use_cuda)
+    # the ref and alt sequences are predicted in a single forward pass
+    n_refs = len(batch_ref_seqs)
+    outputs = predict(
+        model,
+        np.stack(batch_ref_seqs + batch_alt_seqs),
+        use_cuda=use_cuda)
+    ref_outputs = outputs[:n_refs]
+    alt_outputs = outputs[n_refs:]
     for r in reporters:
         if r.needs_base_pred:
             r.handle_batch_predictions(alt_outputs, batch_ids, ref_outputs)
@@ -2,6 +2,7 @@
 This module provides the `AnalyzeSequences` class and supporting
 methods.
 """
+import functools
 import math
 import os
 from time import time
@@ -17,9 +18,11 @@ from ._common import _truncate_sequence
 from ._common import get_reverse_complement
 from ._common import get_reverse_complement_encoding
 from ._common import predict
-from ._in_silico_mutagenesis import _ism_sample_id
+from ._common import trace_model
+from ._in_silico_mutagenesis import _ism_mutation_arrays
+from ._in_silico_mutagenesis import _ism_sample_ids
+from ._in_silico_mutagenesis import _mutations_list_to_arrays
 from ._in_silico_mutagenesis import in_silico_mutagenesis_sequences
-from ._in_silico_mutagenesis import mutate_sequence
 from ._variant_effect_prediction import _handle_long_ref
 from ._variant_effect_prediction import _handle_standard_ref
 from ._variant_effect_prediction import _handle_ref_alt_predictions
@@ -96,6 +99,18 @@ class AnalyzeSequences(object):
         possible consideration is your model size and whether you are
         using it on the CPU or a CUDA-enabled GPU (i.e. setting
         `use_cuda` to True).
+    use_jit : bool, optional
+        Default is `False`. Compile the model with `torch.jit.trace`
+        before making predictions, which removes the Python overhead
+        of running each layer of the model. Only use this for models
+        whose forward pass does not depend on the values of its input
+        (e.g. no data-dependent control flow).
+    store_dtype : str or numpy.dtype or None, optional
+        Default is None. The data type in which the prediction/score
+        handlers store model predictions/scores, both in memory and in
+        HDF5 output files. If None, the data type of the model
+        predictions is used. Specifying 'float16' halves the memory used
+        and the size of HDF5 outputs, at the cost of precision.
 
     Attributes
     ----------
@@ -111,6 +126,8 @@ class AnalyzeSequences(object):
         Specifies whether to use a CUDA-enabled GPU or not.
     data_parallel : bool
         Whether to use multiple GPUs or not.
+    use_jit : bool
+        Whether the model has been compiled with `torch.jit.trace`.
     reference_sequence : class
         The type of sequence on which this analysis will be performed.
 
@@ -125,7 +142,9 @@ class AnalyzeSequences(object):
                  use_cuda=False,
                  data_parallel=False,
                  reference_sequence=Genome,
-                 write_mem_limit=1500):
+                 write_mem_limit=1500,
+                 use_jit=False,
+                 store_dtype=None):
         """
         Constructs a new `AnalyzeSequences` object.
         """
@@ -155,14 +174,28 @@ class AnalyzeSequences(object):
 
         self.model.eval()
 
-        self.data_parallel = data_parallel
-        if self.data_parallel:
-            self.model = nn.DataParallel(model)
-
         self.use_cuda = use_cuda
         if self.use_cuda:
             self.model.cuda()
 
+        self.use_jit = use_jit
+        if self.use_jit:
+            self.model = trace_model(
+                self.model,
+                batch_size,
+                sequence_length,
+                len(reference_sequence.BASES_ARR),
+                use_cuda=self.use_cuda)
+
+        self.data_parallel = data_parallel
+        if self.data_parallel:
+            # `_is_lua_trained_model` cannot look inside a traced model
+            # once it is wrapped, so its input format is recorded on the
+            # wrapper
+            from_lua = _is_lua_trained_model(self.model)
+            self.model = nn.DataParallel(self.model)
+            self.model.from_lua = from_lua
+
         self.sequence_length = sequence_length
 
         self._start_radius = sequence_length // 2
@@ -179,6 +212,7 @@ class AnalyzeSequences(object):
         else:  # even if not using Genome, I guess we can update?
             Genome.update_bases_order(['A', 'C', 'G', 'T'])
         self._write_mem_limit = write_mem_limit
+        self._store_dtype = store_dtype
 
     def _initialize_reporters(self,
                               save_data,
@@ -244,19 +278,29 @@ class AnalyzeSequences(object):
                 write_labels = True
             if "diffs" == s:
                 reporters.append(DiffScoreHandler(
-                    *constructor_args, write_labels=write_labels))
+                    *constructor_args,
+                    write_labels=write_labels,
+                    store_dtype=self._store_dtype))
             elif "abs_diffs" == s:
                 reporters.append(AbsDiffScoreHandler(
-                    *constructor_args, write_labels=write_labels))
+                    *constructor_args,
+                    write_labels=write_labels,
+                    store_dtype=self._store_dtype))
             elif "logits" == s:
                 reporters.append(LogitScoreHandler(
-                    *constructor_args, write_labels=write_labels))
+                    *constructor_args,
+                    write_labels=write_labels,
+                    store_dtype=self._store_dtype))
             elif "predictions" == s and mode != "varianteffect":
                 reporters.append(WritePredictionsHandler(
-                    *constructor_args, write_labels=write_labels))
+                    *constructor_args,
+                    write_labels=write_labels,
+                    store_dtype=self._store_dtype))
             elif "predictions" == s and mode == "varianteffect":
                 reporters.append(WriteRefAltHandler(
-                    *constructor_args, write_labels=write_labels))
+                    *constructor_args,
+                    write_labels=write_labels,
+                    store_dtype=self._store_dtype))
         return reporters
 
     def _get_sequences_from_bed_file(self,
@@ -437,7 +481,7 @@ class AnalyzeSequences(object):
             preds = predict(self.model, sequences, use_cuda=self.use_cuda)
             reporter.handle_batch_predictions(preds, batch_ids)
 
-        reporter.write_to_file()
+        reporter.write_to_file(close=True)
 
     def get_predictions_for_fasta_file(self,
                                        input_path,
@@ -519,7 +563,7 @@ class AnalyzeSequences(object):
             reporter.handle_batch_predictions(preds, batch_ids)
 
         fasta_file.close()
-        reporter.write_to_file()
+        reporter.write_to_file(close=True)
 
 
     def get_predictions(self,
@@ -611,11 +655,16 @@ class AnalyzeSequences(object):
             The sequence to mutate.
         base_preds : numpy.ndarray
             The model's prediction for `sequence`.
-        mutations_list : list(list(tuple))
+        mutations_list : list(list(tuple)) or tuple(numpy.ndarray, numpy.ndarray)
             The mutations to apply to the sequence. Each element in
             `mutations_list` is a list of tuples, where each tuple
             specifies the `int` position in the sequence to mutate and what
             `str` base to which the position is mutated (e.g. (1, 'A')).
+            Alternatively, a tuple of 2 arrays of shape
+            :math:`M \\times K` (:math:`M` mutated sequences with
+            :math:`K` mutations each), containing the positions to mutate
+            and the indices of the bases (in
+            `self.reference_sequence.BASES_ARR`) to which they are mutated.
         reporters : list(PredictionsHandler)
             The list of reporters, where each reporter handles the predictions
             made for each mutated sequence. Will collect, compute scores
@@ -630,24 +679,48 @@ class AnalyzeSequences(object):
             `reporters`.
 
         """
+        if isinstance(mutations_list, tuple):
+            positions, alt_indices = mutations_list
+        else:
+            positions, alt_indices = _mutations_list_to_arrays(
+                mutations_list, reference_sequence=self.reference_sequence)
+        sample_ids = _ism_sample_ids(
+            sequence, positions, alt_indices,
+            reference_sequence=self.reference_sequence)
+
         current_sequence_encoding = self.reference_sequence.sequence_to_encoding(
             sequence)
-        for i in range(0, len(mutations_list), self.batch_size):
+        # A single buffer holding `batch_size` copies of the reference
+        # encoding is reused for every batch: the mutations are applied
+        # to it before the batch is predicted and reverted afterwards.
+        buffer_shape = (min(self.batch_size, len(positions)),
+                        *current_sequence_encoding.shape)
+        if self.use_cuda:
+            # page-locked memory speeds up the copy to the GPU
+            mutated_buffer = torch.empty(
+                buffer_shape, pin_memory=True).numpy()
+        else:
+            mutated_buffer = np.empty(buffer_shape, dtype=np.float32)
+        mutated_buffer[:] = current_sequence_encoding
+        for i in range(0, len(positions), self.batch_size):
             start = i
-            end = min(i + self.batch_size, len(mutations_list))
-
-            mutated_sequences = np.zeros(
-                (end - start, *current_sequence_encoding.shape))
-
-            batch_ids = []
-            for ix, mutation_info in enumerate(mutations_list[start:end]):
-                mutated_seq = mutate_sequence(
-                    current_sequence_encoding, mutation_info,
-                    reference_sequence=self.reference_sequence)
-                mutated_sequences[ix, :, :] = mutated_seq
-                batch_ids.append(_ism_sample_id(sequence, mutation_info))
+            end = min(i + self.batch_size, len(positions))
+
+            batch_positions = positions[start:end]
+            batch_alt_indices = alt_indices[start:end]
+
+            # Apply all mutations in the batch with a single
+            # fancy-indexing pass over the reference encodings.
+            mutated_sequences = mutated_buffer[:end - start]
+            rows = np.arange(end - start)[:, np.newaxis]
+            mutated_sequences[rows, batch_positions, :] = 0
+            mutated_sequences[rows, batch_positions, batch_alt_indices] = 1
+
+            batch_ids = sample_ids[start:end]
             outputs = predict(
                 self.model, mutated_sequences, use_cuda=self.use_cuda)
+            mutated_sequences[rows, batch_positions, :] = \
+                current_sequence_encoding[batch_positions, :]
 
             for r in reporters:
                 if r.needs_base_pred:
@@ -656,7 +729,7 @@ class AnalyzeSequences(object):
                     r.handle_batch_predictions(outputs, batch_ids)
 
         for r in reporters:
-            r.write_to_file()
+            r.write_to_file(close=True)
 
     def in_silico_mutagenesis(self,
                               sequence,
@@ -759,7 +832,7 @@ class AnalyzeSequences(object):
             sequence = sequence[start:end]
 
         sequence = str.upper(sequence)
-        mutated_sequences = in_silico_mutagenesis_sequences(
+        mutated_sequences = _ism_mutation_arrays(
             sequence, mutate_n_bases=1,
             reference_sequence=self.reference_sequence,
             start_position=start_position,
@@ -769,7 +842,7 @@ class AnalyzeSequences(object):
             output_path_prefix,
             output_format,
             ISM_COLS,
-            output_size=len(mutated_sequences))
+            output_size=len(mutated_sequences[0]))
 
         current_sequence_encoding = \
             self.reference_sequence.sequence_to_encoding(sequence)
@@ -786,7 +859,7 @@ class AnalyzeSequences(object):
                 output_format, ["name"], output_size=1)[0]
             ref_reporter.handle_batch_predictions(
                 base_preds, [["input_sequence"]])
-            ref_reporter.write_to_file()
+            ref_reporter.write_to_file(close=True)
         elif "predictions" in save_data and output_format == 'tsv':
             reporters[-1].handle_batch_predictions(
                 base_preds, [["input_sequence", "NA", "NA"]])
@@ -903,7 +976,7 @@ class AnalyzeSequences(object):
             cur_sequence = self._pad_or_truncate_sequence(str.upper(str(fasta_record)))
 
             # Generate mut sequences and base preds.
-            mutated_sequences = in_silico_mutagenesis_sequences(
+            mutated_sequences = _ism_mutation_arrays(
                 cur_sequence,
                 mutate_n_bases=mutate_n_bases,
                 reference_sequence=self.reference_sequence,
@@ -929,7 +1002,7 @@ class AnalyzeSequences(object):
                 file_prefix,
                 output_format,
                 ISM_COLS,
-                output_size=len(mutated_sequences))
+                output_size=len(mutated_sequences[0]))
 
             if "predictions" in save_data and output_format == 'hdf5':
                 ref_reporter = self._initialize_reporters(
@@ -938,7 +1011,7 @@ class AnalyzeSequences(object):
                     output_format, ["name"], output_size=1)[0]
                 ref_reporter.handle_batch_predictions(
                     base_preds, [["input_sequence"]])
-                ref_reporter.write_to_file()
+                ref_reporter.write_to_file(close=True)
             elif "predictions" in save_data and output_format == 'tsv':
                 reporters[-1].handle_batch_predictions(
                     base_preds, [["input_sequence", "NA", "NA"]])
@@ -1046,6 +1119,14 @@ class AnalyzeSequences(object):
             output_size=len(variants),
             mode="varianteffect")
 
+        # each alternate allele of a variant is a separate entry centered
+        # on the same window, so the encodings of recently queried
+        # windows and reference alleles are cached
+        encode_window = functools.lru_cache(maxsize=256)(
+            self.reference_sequence.get_encoding_from_coords_check_unk)
+        encode_ref = functools.lru_cache(maxsize=256)(
+            self.reference_sequence.sequence_to_encoding)
+
         batch_ref_seqs = []
         batch_alt_seqs = []
         batch_ids = []
@@ -1056,15 +1137,16 @@ class AnalyzeSequences(object):
             center = pos + len(ref) // 2
             start = center - self._start_radius
             end = center + self._end_radius
-            ref_sequence_encoding, contains_unk = \
-                self.reference_sequence.get_encoding_from_coords_check_unk(
-                    chrom, start, end)
+            window_encoding, contains_unk = encode_window(chrom, start, end)
+            ref_encoding = encode_ref(ref)
 
-            ref_encoding = self.reference_sequence.sequence_to_encoding(ref)
             alt_sequence_encoding = _process_alt(
                 chrom, pos, ref, alt, start, end,
-                ref_sequence_encoding,
+                window_encoding,
                 self.reference_sequence)
+            # the reference sequence encoding may be modified below, so
+            # the cached window is copied
+            ref_sequence_encoding = window_encoding.copy()
 
             match = True
             seq_at_ref = None
@@ -1137,7 +1219,7 @@ class AnalyzeSequences(object):
                 use_cuda=self.use_cuda)
 
         for r in reporters:
-            r.write_to_file()
+            r.write_to_file(close=True)
 
     def _pad_or_truncate_sequence(self, sequence):
         if len(sequence) < self.sequence_length:
@@ -41,6 +41,17 @@ class AbsDiffScoreHandler(PredictionsHandler):
         same set of inputs with output format `hdf5`, set `write_label` to
         False on all handlers except 1 so that only 1 handler writes the
         row labels to an output file.
+    write_buffer_size : int, optional
+        Default is 4194304 (4 MiB). The size, in bytes, of the buffer used
+        when writing to the output TSV file (or to the row labels file,
+        for HDF5 outputs). Rows are only written to disk once the buffer
+        is full, so a large buffer means fewer, larger writes.
+    store_dtype : str or numpy.dtype or None, optional
+        Default is None. The data type in which the predictions/scores
+        are stored in memory and in the output HDF5 file. If None, the
+        data type of the model predictions is used (32-bit floats for
+        the HDF5 file). Use 'float16' to halve the memory used and the
+        size of the output file, at the cost of precision.
 
     Attributes
     ----------
@@ -57,7 +68,9 @@ class AbsDiffScoreHandler(PredictionsHandler):
                  output_format,
                  output_size=None,
                  write_mem_limit=1500,
-                 write_labels=True):
+                 write_labels=True,
+                 write_buffer_size=4 * 1024 * 1024,
+                 store_dtype=None):
         """
         Constructs a new `AbsDiffScoreHandler` object.
         """
@@ -68,10 +81,10 @@ class AbsDiffScoreHandler(PredictionsHandler):
             output_format,
             output_size=output_size,
             write_mem_limit=write_mem_limit,
-            write_labels=write_labels)
+            write_labels=write_labels,
+            write_buffer_size=write_buffer_size,
+            store_dtype=store_dtype)
         self.needs_base_pred = True
-        self._results = []
-        self._samples = []
 
         self._features = features
         self._columns_for_ids = columns_for_ids
@@ -113,14 +126,17 @@ class AbsDiffScoreHandler(PredictionsHandler):
 
         """
         absolute_diffs = np.abs(baseline_predictions - batch_predictions)
-        self._results.append(absolute_diffs)
-        self._samples.append(batch_ids)
-        if self._reached_mem_limit():
-            self.write_to_file()
+        self._store_batch(absolute_diffs, batch_ids)
 
-    def write_to_file(self):
+    def write_to_file(self, close=False):
         """
         Writes stored scores to a file.
 
+        Parameters
+        ----------
+        close : bool, optional
+            Default is `False`. Whether to close the output file after
+            writing. Should be `True` once all batches have been handled.
+
         """
-        super().write_to_file()
+        super().write_to_file(close=close)
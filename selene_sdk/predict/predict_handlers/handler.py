@@ -6,10 +6,13 @@ output them according to a user-specified output format.
 """
 from abc import ABCMeta
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import os
 from sys import getsizeof
+import weakref
 
 import h5py
+import numpy as np
 
 
 def write_to_tsv_file(data_across_features, info_cols, output_filepath):
@@ -33,13 +36,100 @@ def write_to_tsv_file(data_across_features, info_cols, output_filepath):
         Filepath to which to write outputs
 
     """
-    with open(output_filepath, 'a') as output_handle:
-        for info_batch, preds_batch in zip(info_cols, data_across_features):
-            for info, preds in zip(info_batch, preds_batch):
-                preds_str = '\t'.join(
-                    probabilities_to_string(list(preds)))
-                info_str = '\t'.join([str(i) for i in info])
-                output_handle.write("{0}\t{1}\n".format(info_str, preds_str))
+    with open(output_filepath, 'ab') as output_handle:
+        _write_tsv_rows(data_across_features, info_cols, output_handle)
+
+
+# the number of rows converted to Python floats at a time when
+# formatting predictions for a TSV file
+_N_ROWS_PER_FORMAT = 1024
+
+
+def _write_tsv_rows(data_across_features, info_cols, output_handle):
+    """
+    Writes samples to a tab-delimited file opened in binary mode. See
+    `write_to_tsv_file` for a description of the parameters.
+
+    The rows in each element of `data_across_features` are formatted
+    first and then written with a single call to `output_handle.write`,
+    which passes writes larger than the file's buffer straight through
+    to the OS.
+
+    """
+    write = output_handle.write
+    for info_batch, preds_batch in zip(info_cols, data_across_features):
+        write(_format_tsv_rows(preds_batch, _join_ids(info_batch)).encode())
+
+
+def _join_ids(batch_ids):
+    """
+    Joins the columns that identify each sequence in a batch into a
+    single tab-delimited string.
+
+    Parameters
+    ----------
+    batch_ids : list(arraylike) or numpy.ndarray
+        The identifiers for each sequence in the batch. If an array,
+        each column is one of the identifying columns.
+
+    Returns
+    -------
+    list(str)
+        The tab-delimited identifiers for each sequence.
+
+    """
+    if isinstance(batch_ids, np.ndarray) and batch_ids.ndim == 2:
+        # an array is joined column by column: every value in an array
+        # has the same type, so only non-string columns need converting
+        columns = [batch_ids[:, i].tolist()
+                   for i in range(batch_ids.shape[1])]
+        if batch_ids.dtype.kind != 'U':
+            columns = [list(map(str, c)) for c in columns]
+        return list(map('\t'.join, zip(*columns)))
+    return ['\t'.join([str(i) for i in ids]) for ids in batch_ids]
+
+
+def _format_tsv_rows(preds_batch, info_batch):
+    """
+    Formats a batch of samples as tab-delimited rows.
+
+    Parameters
+    ----------
+    preds_batch : arraylike
+        The predictions/scores for each sample in the batch.
+    info_batch : list(str)
+        The identifying information for each sample in the batch,
+        already joined into a tab-delimited string (see `_join_ids`).
+
+    Returns
+    -------
+    str
+        A newline-terminated line for each sample, in which the
+        sample's information is followed by its predictions/scores.
+
+    """
+    preds_fmt = None
+    rows = []
+    append = rows.append
+    for start in range(0, len(preds_batch), _N_ROWS_PER_FORMAT):
+        end = start + _N_ROWS_PER_FORMAT
+        preds_chunk = preds_batch[start:end]
+        if isinstance(preds_chunk, np.ndarray):
+            # converting to a list of Python floats up front is much
+            # faster than formatting the numpy scalars one at a time.
+            # This is done a chunk at a time so that only one chunk's
+            # worth of (much larger) Python floats is alive at once.
+            preds_chunk = preds_chunk.tolist()
+        for info, preds in zip(info_batch[start:end], preds_chunk):
+            if preds_fmt is None:
+                # a single format string for all the values in a row,
+                # equivalent to `probabilities_to_string`
+                preds_fmt = '\t'.join(['%.2e'] * len(preds))
+            append("{0}\t{1}".format(info, preds_fmt % tuple(preds)))
+    if not rows:
+        return ''
+    rows.append('')
+    return '\n'.join(rows)
 
 
 def write_to_hdf5_file(data_across_features,
@@ -82,17 +172,35 @@ def write_to_hdf5_file(data_across_features,
         The updated start_index.
     """
     if info_filepath is not None:
-        with open(info_filepath, 'a') as info_handle:
+        with open(info_filepath, 'ab') as info_handle:
             for info_batch in info_cols:
-                for info in info_batch:
-                    info_str = '\t'.join([str(i) for i in info])
-                    info_handle.write("{0}\n".format(info_str))
+                _write_label_rows(_join_ids(info_batch), info_handle)
     with h5py.File(hdf5_filepath, 'a') as hdf5_handle:
-        data = hdf5_handle["data"]
-        for data_batch in data_across_features:
-            data[start_index :(start_index + data_batch.shape[0])] = data_batch
-            start_index = start_index + data_batch.shape[0]
+        start_index = _write_hdf5_rows(
+            data_across_features, hdf5_handle["data"], start_index)
+
+    return start_index
+
 
+def _write_label_rows(info_batch, info_handle):
+    """
+    Writes a batch of row labels, already joined into tab-delimited
+    strings (see `_join_ids`), to a .txt file opened in binary mode.
+
+    """
+    if info_batch:
+        info_handle.write("{0}\n".format('\n'.join(info_batch)).encode())
+
+
+def _write_hdf5_rows(data_across_features, data, start_index):
+    """
+    Writes samples to the dataset `data` of an open HDF5 file, starting
+    at row `start_index`, and returns the updated start index.
+
+    """
+    for data_batch in data_across_features:
+        data[start_index :(start_index + data_batch.shape[0])] = data_batch
+        start_index = start_index + data_batch.shape[0]
     return start_index
 
 
@@ -114,6 +222,29 @@ def probabilities_to_string(probabilities):
     return ["{:.2e}".format(p) for p in probabilities]
 
 
+def _close_text_file(handle):
+    """
+    Closes an output file. On platforms that support it, the OS is then
+    advised that the file's pages will not be read again, so that it can
+    start writing them back and evict them from its cache now rather
+    than stalling when the process exits.
+
+    """
+    handle.flush()
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(
+                handle.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+    handle.close()
+
+
+# handlers write their results to file every `_N_BATCHES_PER_WRITE`
+# batches (or sooner, if the memory limit is reached)
+_N_BATCHES_PER_WRITE = 8
+
+
 class PredictionsHandler(metaclass=ABCMeta):
     """
     The abstract base class for handlers, which "handle" model
@@ -122,6 +253,15 @@ class PredictionsHandler(metaclass=ABCMeta):
     and then returning them in a user-specified output format (Selene
     currently supports TSV and HDF5 file outputs)
 
+    Handlers can be used as context managers, in which case `close` is
+    called (writing any remaining results to file) on exit. Handlers
+    that are never closed are closed when the interpreter exits.
+
+    Results are written to file on a background thread while the
+    handler keeps accepting new batches, so a handler may hold up to
+    twice `write_mem_limit` worth of results while a write is in
+    progress.
+
     Parameters
     ----------
     features : list(str)
@@ -151,6 +291,17 @@ class PredictionsHandler(metaclass=ABCMeta):
         same set of inputs with output format `hdf5`, set `write_label` to
         False on all handlers except 1 so that only 1 handler writes the
         row labels to an output file.
+    write_buffer_size : int, optional
+        Default is 4194304 (4 MiB). The size, in bytes, of the buffer used
+        when writing to the output TSV file (or to the row labels file,
+        for HDF5 outputs). Rows are only written to disk once the buffer
+        is full, so a large buffer means fewer, larger writes.
+    store_dtype : str or numpy.dtype or None, optional
+        Default is None. The data type in which the predictions/scores
+        are stored in memory and in the output HDF5 file. If None, the
+        data type of the model predictions is used (32-bit floats for
+        the HDF5 file). Use 'float16' to halve the memory used and the
+        size of the output file, at the cost of precision.
 
     Attributes
     ----------
@@ -166,10 +317,17 @@ class PredictionsHandler(metaclass=ABCMeta):
                  output_format,
                  output_size=None,
                  write_mem_limit=1500,
-                 write_labels=True):
+                 write_labels=True,
+                 write_buffer_size=4 * 1024 * 1024,
+                 store_dtype=None):
         self.needs_base_pred = False
-        self._results = []
+        # results are copied into a preallocated buffer, of which
+        # the first `_n_rows` rows are in use
+        self._results = None
+        self._spare_results = None
+        self._n_rows = 0
         self._samples = []
+        self._bytes_buffered = 0
 
         self._features = features
         self._columns_for_ids = columns_for_ids
@@ -181,11 +339,30 @@ class PredictionsHandler(metaclass=ABCMeta):
                              "`output_format` is 'hdf5'.")
 
         self._output_filepath = None
+        self._output_handle = None
+        self._column_names_line = None
+        self._header_written = False
+        self._closed = False
+        # buffered results are written to file on a background thread,
+        # one write at a time
+        self._write_executor = None
+        self._pending_write = None
         self._labels_filepath = None
+        self._labels_handle = None
         self._hdf5_start_index = None
 
         self._write_mem_limit = write_mem_limit
         self._write_labels = write_labels
+        self._write_buffer_size = write_buffer_size
+        self._store_dtype = None
+        if store_dtype is not None:
+            self._store_dtype = np.dtype(store_dtype)
+
+        # a handler that is never closed is closed when the interpreter
+        # exits, before modules are torn down. The finalizer keeps the
+        # handler alive until then, so it is detached once the handler
+        # is closed.
+        self._finalizer = weakref.finalize(self, self.close)
 
     def _create_write_handler(self, handler_filename):
         """
@@ -205,17 +382,26 @@ class PredictionsHandler(metaclass=ABCMeta):
         scores_filepath = os.path.join(output_path, handler_filename)
         if self._output_format == "tsv":
             self._output_filepath = "{0}.tsv".format(scores_filepath)
-            with open(self._output_filepath, 'w+') as output_handle:
-                column_names = self._columns_for_ids + self._features
-                output_handle.write("{0}\n".format(
-                    '\t'.join(column_names)))
+            # the file is only opened (and the header written) once
+            # there are rows to write to it. See `_open_tsv_file`.
+            column_names = self._columns_for_ids + self._features
+            self._column_names_line = "{0}\n".format(
+                '\t'.join(column_names)).encode()
         elif self._output_format == "hdf5":
             self._output_filepath = "{0}.h5".format(scores_filepath)
-            with h5py.File(self._output_filepath, 'w') as output_handle:
-                output_handle.create_dataset(
-                    "data",
-                    (self._output_size, len(self._features)),
-                    dtype='float64')
+            # model outputs are single precision, so storing them as
+            # float64 would only double the size of the file
+            dtype = 'float32'
+            if self._store_dtype is not None:
+                dtype = self._store_dtype
+            # like the TSV file, the HDF5 file and the row labels
+            # file are kept open until `write_to_file` is called with
+            # `close=True`, rather than being reopened on every write
+            self._output_handle = h5py.File(self._output_filepath, 'w')
+            self._output_handle.create_dataset(
+                "data",
+                (self._output_size, len(self._features)),
+                dtype=dtype)
             self._hdf5_start_index = 0
 
             if not self._write_labels:
@@ -229,15 +415,97 @@ class PredictionsHandler(metaclass=ABCMeta):
                 labels_filename = "{0}_{1}".format(
                     filename_prefix, labels_filename)
             self._labels_filepath = os.path.join(output_path, labels_filename)
-            # create the file
-            label_handle = open(self._labels_filepath, 'w+')
-            label_handle.write("{0}\n".format(
-                                '\t'.join(self._columns_for_ids)))
+            self._labels_handle = open(
+                self._labels_filepath, 'wb',
+                buffering=self._write_buffer_size)
+            self._labels_handle.write("{0}\n".format(
+                '\t'.join(self._columns_for_ids)).encode())
+
+    def _open_tsv_file(self):
+        """
+        Opens the output TSV file and writes the header line. The file
+        is kept open until `write_to_file` is called with `close=True`.
+
+        """
+        # the file is written in binary mode: each write is encoded
+        # once here instead of going through a text wrapper
+        self._output_handle = open(
+            self._output_filepath, 'wb',
+            buffering=self._write_buffer_size)
+        self._output_handle.write(self._column_names_line)
+        self._header_written = True
 
     def _reached_mem_limit(self):
-        mem_used = (self._results[0].nbytes * len(self._results) +
-                    getsizeof(self._samples[0]) * len(self._samples))
-        return mem_used / 10**6 >= self._write_mem_limit
+        return self._bytes_buffered / 10**6 >= self._write_mem_limit
+
+    def _store_batch(self, batch_results, batch_ids):
+        """
+        Stores the results and identifiers for a batch of sequences,
+        writing the stored data to file whenever the results buffer is
+        full or the memory limit is reached. Results are copied into a
+        preallocated buffer (and a spare of the same size that is filled
+        while the other is being written), so storing a batch only
+        allocates a new array when a larger buffer is needed.
+
+        Parameters
+        ----------
+        batch_results : numpy.ndarray
+            The predictions or scores for the batch, of dimensions
+            :math:`B \\times N`.
+        batch_ids : list(arraylike)
+            The identifiers for each of the :math:`B` sequences.
+
+        """
+        n_batch = batch_results.shape[0]
+        if self._results is None:
+            # results are cast to `store_dtype` when they are copied
+            # into the buffer
+            dtype = batch_results.dtype
+            if self._store_dtype is not None:
+                dtype = self._store_dtype
+        else:
+            dtype = self._results.dtype
+        # size the buffer to hold `_N_BATCHES_PER_WRITE` of the largest
+        # batches seen so far, but no more rows than fit in the memory
+        # limit or than the total number of rows output. Batches that
+        # do not fit are split across successive writes
+        row_nbytes = max(
+            int(np.prod(batch_results.shape[1:])) * dtype.itemsize, 1)
+        capacity = min(_N_BATCHES_PER_WRITE * n_batch,
+                       int(self._write_mem_limit * 10**6 // row_nbytes))
+        if self._output_size is not None:
+            capacity = min(capacity, self._output_size)
+        capacity = max(capacity, 1)
+        if self._results is None or capacity > self._results.shape[0]:
+            # the buffer only grows, e.g. when the first batch is a
+            # single base prediction followed by full-size batches
+            results = np.empty(
+                (capacity, *batch_results.shape[1:]), dtype=dtype)
+            if self._results is not None:
+                results[:self._n_rows] = self._results[:self._n_rows]
+            self._results = results
+            # a spare of the new size is allocated at the next write
+            self._spare_results = None
+
+        # the identifiers are joined into the tab-delimited strings that
+        # are written to file right away, rather than at write time
+        batch_ids = _join_ids(batch_ids)
+        capacity = self._results.shape[0]
+        start = 0
+        while start < n_batch:
+            end = start + min(n_batch - start, capacity - self._n_rows)
+            self._results[self._n_rows:self._n_rows + end - start] = \
+                batch_results[start:end]
+            self._n_rows += end - start
+            self._samples.extend(batch_ids[start:end])
+            self._bytes_buffered += (
+                (end - start) * self._results[0].nbytes +
+                sum(map(getsizeof, batch_ids[start:end])))
+            if self._n_rows == capacity:
+                self.write_to_file()
+            start = end
+        if self._reached_mem_limit():
+            self.write_to_file()
 
     @abstractmethod
     def handle_batch_predictions(self, *args, **kwargs):
@@ -246,23 +514,130 @@ class PredictionsHandler(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
-    def write_to_file(self):
+    def write_to_file(self, close=False):
         """
-        Writes accumulated handler results to file.
+        Writes accumulated handler results to file. Results are written
+        on a background thread, so an error raised while writing is
+        re-raised by the next call to `write_to_file`.
+
+        Parameters
+        ----------
+        close : bool, optional
+            Default is `False`. Whether to close the output file after
+            writing. Should be `True` once all batches have been handled.
 
         """
-        if not self._results:
-            return None
-        if self._hdf5_start_index is not None:
-            self._hdf5_start_index = write_to_hdf5_file(
-                self._results,
-                self._samples,
-                self._output_filepath,
-                self._hdf5_start_index,
-                info_filepath=self._labels_filepath)
+        if self._n_rows:
+            self._write_results()
         else:
-            write_to_tsv_file(self._results,
-                              self._samples,
-                              self._output_filepath)
-        self._results = []
+            self._wait_for_write()
+        if close:
+            self._wait_for_write()
+            if self._write_executor is not None:
+                self._write_executor.shutdown()
+                self._write_executor = None
+        if close and self._column_names_line is not None and \
+                not self._header_written:
+            # no rows were written, but the output file should still
+            # exist and contain the header
+            self._open_tsv_file()
+        if close and self._output_handle is not None:
+            if self._hdf5_start_index is None:
+                _close_text_file(self._output_handle)
+            else:
+                self._output_handle.close()
+            self._output_handle = None
+            if self._labels_handle is not None:
+                _close_text_file(self._labels_handle)
+                self._labels_handle = None
+        if close:
+            self._mark_closed()
+
+    def _mark_closed(self):
+        """
+        Records that the handler's files have been closed.
+
+        """
+        self._closed = True
+        self._finalizer.detach()
+
+    def close(self):
+        """
+        Writes any remaining results to file and closes the output
+        file(s). Does nothing if the handler has already been closed.
+
+        """
+        if not self._closed:
+            self.write_to_file(close=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        # unclosed handlers are closed by `_finalizer` instead: I/O
+        # from `__del__` fails if it runs during interpreter teardown
+        # (e.g. `open` is no longer defined)
+        pass
+
+    def _write_results(self):
+        """
+        Hands the results and identifiers in the buffer off to a
+        background thread that writes them to file, and swaps in an
+        empty buffer so that the handler can keep accepting batches in
+        the meantime.
+
+        """
+        self._wait_for_write()
+        results = self._results[:self._n_rows]
+        samples = self._samples
+        if self._spare_results is None:
+            self._spare_results = np.empty_like(self._results)
+        self._results, self._spare_results = \
+            self._spare_results, self._results
+
+        start_index = self._hdf5_start_index
+        if start_index is not None:
+            self._hdf5_start_index += self._n_rows
+        elif not self._header_written:
+            self._open_tsv_file()
+        if self._write_executor is None:
+            self._write_executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            self._pending_write = self._write_executor.submit(
+                self._write_rows, results, samples, start_index)
+        except RuntimeError:
+            # new threads cannot be started once the interpreter is
+            # shutting down (e.g. if the handler is closed at exit)
+            self._write_rows(results, samples, start_index)
+
+        self._n_rows = 0
         self._samples = []
+        self._bytes_buffered = 0
+
+    def _write_rows(self, results, samples, start_index):
+        """
+        Writes results and their identifiers to the output file(s).
+        Runs on the handler's background writer thread.
+
+        """
+        if start_index is not None:
+            if self._labels_handle is not None:
+                _write_label_rows(samples, self._labels_handle)
+            _write_hdf5_rows(
+                [results], self._output_handle["data"], start_index)
+        else:
+            self._output_handle.write(
+                _format_tsv_rows(results, samples).encode())
+
+    def _wait_for_write(self):
+        """
+        Blocks until the write currently in progress (if any) is
+        finished. Errors raised while writing are re-raised here.
+
+        """
+        if self._pending_write is not None:
+            pending, self._pending_write = self._pending_write, None
+            pending.result()
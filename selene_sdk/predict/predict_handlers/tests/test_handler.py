@@ -0,0 +1,211 @@
+"""
+Test methods in the handler module
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import weakref
+
+import h5py
+import numpy as np
+
+from selene_sdk.predict.predict_handlers import WritePredictionsHandler
+from selene_sdk.predict.predict_handlers.handler import \
+    probabilities_to_string
+
+
+class TestPredictionsHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.features = ["f0", "f1", "f2"]
+        self.columns_for_ids = ["name", "index"]
+        self.predictions = np.random.RandomState(0).rand(
+            20, len(self.features))
+        self.ids = [["seq{0}".format(i), i] for i in range(20)]
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def _handler(self, output_format="tsv", **kwargs):
+        return WritePredictionsHandler(
+            self.features,
+            self.columns_for_ids,
+            self.output_dir,
+            output_format,
+            output_size=len(self.predictions),
+            **kwargs)
+
+    def _handle_rows(self, handler, start, end):
+        handler.handle_batch_predictions(
+            self.predictions[start:end], self.ids[start:end])
+
+    def _expected_tsv_lines(self, n_rows):
+        lines = ['\t'.join(self.columns_for_ids + self.features)]
+        for ids, preds in zip(self.ids[:n_rows], self.predictions):
+            lines.append('\t'.join(
+                [str(i) for i in ids] + probabilities_to_string(preds)))
+        return lines
+
+    def _read_tsv_lines(self):
+        tsv_path = os.path.join(self.output_dir, "predictions.tsv")
+        with open(tsv_path, 'r') as file_handle:
+            return file_handle.read().splitlines()
+
+    def _block_writes(self, handler):
+        # holds the background write until `release` is set
+        release = threading.Event()
+        write_rows = handler._write_rows
+
+        def blocked_write_rows(*args):
+            release.wait(10)
+            write_rows(*args)
+
+        handler._write_rows = blocked_write_rows
+        return release
+
+    def test_write_error_raised_on_next_write(self):
+        handler = self._handler()
+
+        def failing_write_rows(*args):
+            raise OSError("disk full")
+
+        handler._write_rows = failing_write_rows
+        self._handle_rows(handler, 0, 4)
+        handler.write_to_file()
+        with self.assertRaises(OSError):
+            handler.write_to_file()
+
+        del handler._write_rows
+        handler.close()
+
+    def test_write_error_raised_while_storing_next_rows(self):
+        handler = self._handler()
+
+        def failing_write_rows(*args):
+            raise OSError("disk full")
+
+        handler._write_rows = failing_write_rows
+        self._handle_rows(handler, 0, 4)
+        handler.write_to_file()
+        self._handle_rows(handler, 4, 8)
+        with self.assertRaises(OSError):
+            handler.write_to_file()
+
+        del handler._write_rows
+        handler.close()
+
+    def test_rows_stored_during_pending_write_tsv(self):
+        handler = self._handler()
+        release = self._block_writes(handler)
+        self._handle_rows(handler, 0, 4)
+        handler.write_to_file()
+        # these rows are stored while the first write is still pending
+        self._handle_rows(handler, 4, 6)
+        self._handle_rows(handler, 6, 9)
+        self.assertFalse(handler._pending_write.done())
+        release.set()
+        self._handle_rows(handler, 9, 12)
+        handler.write_to_file(close=True)
+
+        self.assertListEqual(
+            self._read_tsv_lines(), self._expected_tsv_lines(12))
+
+    def test_rows_stored_during_pending_write_hdf5(self):
+        handler = self._handler(output_format="hdf5")
+        release = self._block_writes(handler)
+        self._handle_rows(handler, 0, 5)
+        handler.write_to_file()
+        self._handle_rows(handler, 5, 10)
+        self._handle_rows(handler, 10, 15)
+        self.assertFalse(handler._pending_write.done())
+        release.set()
+        self._handle_rows(handler, 15, 20)
+        handler.write_to_file(close=True)
+
+        with h5py.File(
+                os.path.join(self.output_dir, "predictions.h5"), 'r') as fh:
+            np.testing.assert_array_equal(
+                fh["data"][()], self.predictions.astype(np.float32))
+        labels_path = os.path.join(self.output_dir, "row_labels.txt")
+        with open(labels_path, 'r') as file_handle:
+            labels = file_handle.read().splitlines()
+        self.assertListEqual(
+            labels,
+            ['\t'.join(self.columns_for_ids)] +
+            ["seq{0}\t{0}".format(i) for i in range(20)])
+
+    def test_single_row_batch_then_full_batches(self):
+        # e.g. the base prediction for in silico mutagenesis, followed by
+        # full batches of mutated sequences
+        batch_size = 16
+        n_rows = 1 + 32 * batch_size
+        self.predictions = np.random.RandomState(1).rand(
+            n_rows, len(self.features))
+        self.ids = [["seq{0}".format(i), i] for i in range(n_rows)]
+        handler = self._handler()
+        n_writes = [0]
+        write_rows = handler._write_rows
+
+        def counted_write_rows(*args):
+            n_writes[0] += 1
+            write_rows(*args)
+
+        handler._write_rows = counted_write_rows
+        self._handle_rows(handler, 0, 1)
+        for start in range(1, n_rows, batch_size):
+            self._handle_rows(handler, start, start + batch_size)
+        handler.write_to_file(close=True)
+
+        # the buffer holds 8 full batches, not 8 single-row batches
+        rows_per_write = 8 * batch_size
+        self.assertEqual(n_writes[0], -(-n_rows // rows_per_write))
+        self.assertListEqual(
+            self._read_tsv_lines(), self._expected_tsv_lines(n_rows))
+
+    def test_unclosed_handler_written_at_exit(self):
+        # the handler is a global of a module in a reference cycle, so
+        # it is only collected while the interpreter is torn down
+        module_dir = os.path.join(self.output_dir, "module")
+        os.makedirs(module_dir)
+        with open(os.path.join(module_dir, "holder.py"), 'w') as fh:
+            fh.write("\n".join([
+                "import numpy as np",
+                "from selene_sdk.predict.predict_handlers import "
+                "WritePredictionsHandler",
+                "handler = WritePredictionsHandler(",
+                "    {0!r}, {1!r}, {2!r}, 'tsv')".format(
+                    self.features, self.columns_for_ids, self.output_dir),
+                "handler.handle_batch_predictions(",
+                "    np.array({0!r}), {1!r})".format(
+                    self.predictions[:4].tolist(), self.ids[:4]),
+                ""]))
+        package_dir = os.path.abspath(os.path.join(
+            os.path.dirname(__file__), "..", "..", "..", ".."))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join([package_dir, module_dir])
+        result = subprocess.run(
+            [sys.executable, "-c", "import holder; holder.cycle = holder"],
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            env=env)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertNotIn("Exception ignored", result.stderr)
+        self.assertListEqual(
+            self._read_tsv_lines(), self._expected_tsv_lines(4))
+
+    def test_closed_handler_can_be_collected(self):
+        handler = self._handler()
+        self._handle_rows(handler, 0, 4)
+        handler.close()
+        handler_ref = weakref.ref(handler)
+        del handler
+        self.assertIsNone(handler_ref())
+
+
+if __name__ == "__main__":
+    unittest.main()
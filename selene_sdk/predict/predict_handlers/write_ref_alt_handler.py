@@ -43,6 +43,17 @@ class WriteRefAltHandler(PredictionsHandler):
         same set of inputs with output format `hdf5`, set `write_label` to
         False on all handlers except 1 so that only 1 handler writes the
         row labels to an output file.
+    write_buffer_size : int, optional
+        Default is 4194304 (4 MiB). The size, in bytes, of the buffer used
+        when writing to the output TSV file (or to the row labels file,
+        for HDF5 outputs). Rows are only written to disk once the buffer
+        is full, so a large buffer means fewer, larger writes.
+    store_dtype : str or numpy.dtype or None, optional
+        Default is None. The data type in which the predictions/scores
+        are stored in memory and in the output HDF5 file. If None, the
+        data type of the model predictions is used (32-bit floats for
+        the HDF5 file). Use 'float16' to halve the memory used and the
+        size of the output file, at the cost of precision.
 
     Attributes
     ----------
@@ -59,7 +70,9 @@ class WriteRefAltHandler(PredictionsHandler):
                  output_format,
                  output_size=None,
                  write_mem_limit=1500,
-                 write_labels=True):
+                 write_labels=True,
+                 write_buffer_size=4 * 1024 * 1024,
+                 store_dtype=None):
         """
         Constructs a new `WriteRefAltHandler` object.
         """
@@ -70,7 +83,9 @@ class WriteRefAltHandler(PredictionsHandler):
             output_format,
             output_size=output_size,
             write_mem_limit=write_mem_limit,
-            write_labels=write_labels)
+            write_labels=write_labels,
+            write_buffer_size=write_buffer_size,
+            store_dtype=store_dtype)
 
         self.needs_base_pred = True
         self._features = features
@@ -96,7 +111,9 @@ class WriteRefAltHandler(PredictionsHandler):
             output_format,
             output_size=output_size,
             write_mem_limit=write_mem_limit // 2,
-            write_labels=write_labels)
+            write_labels=write_labels,
+            write_buffer_size=write_buffer_size,
+            store_dtype=store_dtype)
 
         self._alt_writer = WritePredictionsHandler(
             features,
@@ -105,7 +122,9 @@ class WriteRefAltHandler(PredictionsHandler):
             output_format,
             output_size=output_size,
             write_mem_limit=write_mem_limit // 2,
-            write_labels=False)
+            write_labels=False,
+            write_buffer_size=write_buffer_size,
+            store_dtype=store_dtype)
 
     def handle_batch_predictions(self,
                                  batch_predictions,
@@ -138,10 +157,18 @@ class WriteRefAltHandler(PredictionsHandler):
         self._alt_writer.handle_batch_predictions(
             batch_predictions, batch_ids)
 
-    def write_to_file(self):
+    def write_to_file(self, close=False):
         """
         Writes the stored scores to 2 files (1 for ref, 1 for alt).
 
+        Parameters
+        ----------
+        close : bool, optional
+            Default is `False`. Whether to close the output files after
+            writing. Should be `True` once all batches have been handled.
+
         """
-        self._ref_writer.write_to_file()
-        self._alt_writer.write_to_file()
+        self._ref_writer.write_to_file(close=close)
+        self._alt_writer.write_to_file(close=close)
+        if close:
+            self._mark_closed()
@@ -0,0 +1,116 @@
+"""
+Test methods in the _variant_effect_prediction module
+"""
+import math
+import os
+import unittest
+
+import numpy as np
+
+from selene_sdk.predict._common import _truncate_sequence
+from selene_sdk.predict._variant_effect_prediction import _get_ref_idxs
+from selene_sdk.predict._variant_effect_prediction import _process_alt
+from selene_sdk.sequences import Genome
+
+
+FASTA_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "sequences", "tests", "files",
+    "small.fasta")
+
+
+def _build_then_truncate_alt(chrom, pos, ref, alt, start, end,
+                             wt_sequence, reference_sequence):
+    """
+    Builds the full-length alternate sequence and then truncates it to
+    the length of `wt_sequence`.
+    """
+    if alt == '*' or alt == '-':
+        alt = ''
+    ref_len = len(ref)
+    alt_len = len(alt)
+    if alt_len > len(wt_sequence):
+        return reference_sequence.sequence_to_encoding(
+            _truncate_sequence(alt, len(wt_sequence)))
+    alt_encoding = reference_sequence.sequence_to_encoding(alt)
+    if alt_len >= ref_len:
+        start_pos, end_pos = _get_ref_idxs(len(wt_sequence), ref_len)
+        sequence = np.vstack([wt_sequence[:start_pos, :],
+                              alt_encoding,
+                              wt_sequence[end_pos:, :]])
+        trunc_s = (len(sequence) - wt_sequence.shape[0]) // 2
+        return sequence[trunc_s:trunc_s + wt_sequence.shape[0], :]
+    lhs = reference_sequence.get_sequence_from_coords(
+        chrom, start - ref_len // 2 + alt_len // 2, pos + 1, pad=True)
+    rhs = reference_sequence.get_sequence_from_coords(
+        chrom,
+        pos + 1 + ref_len,
+        end + math.ceil(ref_len / 2.) - math.ceil(alt_len / 2.),
+        pad=True)
+    return reference_sequence.sequence_to_encoding(lhs + alt + rhs)
+
+
+class TestProcessAlt(unittest.TestCase):
+
+    def setUp(self):
+        self.genome = Genome(FASTA_PATH)
+        self.chrom = "chr2"
+        self.pos = 40
+
+    def _check_alt(self, sequence_length, ref, alt):
+        start_radius = sequence_length // 2
+        end_radius = start_radius
+        if sequence_length % 2 != 0:
+            start_radius += 1
+        center = self.pos + len(ref) // 2
+        start = center - start_radius
+        end = center + end_radius
+        wt_sequence = self.genome.get_encoding_from_coords(
+            self.chrom, start, end)
+
+        observed = _process_alt(self.chrom, self.pos, ref, alt, start, end,
+                                wt_sequence, self.genome)
+        expected = _build_then_truncate_alt(
+            self.chrom, self.pos, ref, alt, start, end,
+            wt_sequence, self.genome)
+        self.assertEqual(observed.shape, (sequence_length, 4))
+        np.testing.assert_array_equal(observed, expected)
+
+    def test_substitution(self):
+        for sequence_length in [10, 11]:
+            self._check_alt(sequence_length, "A", "G")
+            self._check_alt(sequence_length, "AT", "GC")
+            self._check_alt(sequence_length, "ATG", "GCA")
+
+    def test_insertion(self):
+        for sequence_length in [10, 11]:
+            for ref in ["A", "AT"]:
+                for alt_len in range(len(ref) + 1, len(ref) + 5):
+                    self._check_alt(sequence_length, ref,
+                                    ("CGTAG" * 3)[:alt_len])
+
+    def test_insertion_around_window_length(self):
+        for sequence_length in [10, 11]:
+            for ref in ["A", "AT"]:
+                for alt_len in [sequence_length - 1,
+                                sequence_length,
+                                sequence_length + 1,
+                                sequence_length + 2]:
+                    alt = ("CGTAG" * 3)[:alt_len]
+                    self._check_alt(sequence_length, ref, alt)
+
+    def test_deletion(self):
+        for sequence_length in [10, 11]:
+            self._check_alt(sequence_length, "ACG", "A")
+            self._check_alt(sequence_length, "ACGT", "A")
+            self._check_alt(sequence_length, "ACGTA", "AC")
+
+    def test_deletion_placeholder_alleles(self):
+        for sequence_length in [10, 11]:
+            for alt in ['*', '-']:
+                self._check_alt(sequence_length, "A", alt)
+                self._check_alt(sequence_length, "AC", alt)
+                self._check_alt(sequence_length, "ACG", alt)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,33 @@
+import itertools
+import os
+import shutil
+import tempfile
 import unittest
 
+import numpy as np
+import torch
+import torch.nn as nn
+
+from selene_sdk.predict._in_silico_mutagenesis import _ism_mutation_arrays
+from selene_sdk.predict._in_silico_mutagenesis import _ism_sample_id
+from selene_sdk.predict._in_silico_mutagenesis import _ism_sample_ids
+from selene_sdk.predict._in_silico_mutagenesis import _mutations_list_to_arrays
+from selene_sdk.predict.model_predict import AnalyzeSequences
+from selene_sdk.predict.model_predict import ISM_COLS
 from selene_sdk.predict.model_predict import in_silico_mutagenesis_sequences
+from selene_sdk.sequences import Genome
+from selene_sdk.utils import _is_lua_trained_model
+
+
+def _expected_mutations(sequence, mutate_n_bases, start_position, end_position):
+    sequence_alts = [[b for b in Genome.BASES_ARR if b != ref]
+                     for ref in sequence]
+    expected = []
+    for indices in itertools.combinations(
+            range(start_position, end_position), mutate_n_bases):
+        for alts in itertools.product(*[sequence_alts[i] for i in indices]):
+            expected.append(list(zip(indices, alts)))
+    return expected
 
 class TestModelPredict(unittest.TestCase):
 
@@ -60,5 +87,126 @@ class TestModelPredict(unittest.TestCase):
         self.assertCountEqual(observed, expected)
 
 
+    def test_ism_mutation_arrays_single(self):
+        positions, alt_indices = _ism_mutation_arrays("ATN")
+        np.testing.assert_array_equal(
+            positions, [[0], [0], [0], [1], [1], [1], [2], [2], [2], [2]])
+        np.testing.assert_array_equal(
+            alt_indices, [[1], [2], [3], [0], [1], [2], [0], [1], [2], [3]])
+
+    def test_ism_mutation_arrays_matches_combinations(self):
+        sequence = "ATNCGGTNA"
+        for mutate_n_bases, start, end in [(1, 0, 9), (2, 0, 9),
+                                           (2, 2, 7), (3, 1, 8), (4, 3, 8)]:
+            positions, alt_indices = _ism_mutation_arrays(
+                sequence, mutate_n_bases=mutate_n_bases,
+                start_position=start, end_position=end)
+            expected = _expected_mutations(
+                sequence, mutate_n_bases, start, end)
+            self.assertEqual(positions.shape, (len(expected), mutate_n_bases))
+            observed = [
+                list(zip(pos, [self.bases_arr[a] for a in alts]))
+                for pos, alts in zip(positions.tolist(), alt_indices.tolist())]
+            self.assertListEqual(observed, expected)
+
+    def test_in_silico_muta_sequences_with_unknown_bases(self):
+        observed = in_silico_mutagenesis_sequences(
+            "ANTNC", mutate_n_bases=2, start_position=1, end_position=5)
+        self.assertListEqual(
+            observed, _expected_mutations("ANTNC", 2, 1, 5))
+
+    def test_mutations_list_to_arrays(self):
+        mutations = in_silico_mutagenesis_sequences(
+            "GNATC", mutate_n_bases=2, start_position=1, end_position=4)
+        positions, alt_indices = _mutations_list_to_arrays(mutations)
+        expected_positions, expected_alt_indices = _ism_mutation_arrays(
+            "GNATC", mutate_n_bases=2, start_position=1, end_position=4)
+        np.testing.assert_array_equal(positions, expected_positions)
+        np.testing.assert_array_equal(alt_indices, expected_alt_indices)
+
+    def test_mutations_list_to_arrays_empty(self):
+        positions, alt_indices = _mutations_list_to_arrays([])
+        self.assertEqual(positions.ndim, 2)
+        self.assertEqual(positions.shape[0], 0)
+        self.assertEqual(alt_indices.shape, positions.shape)
+        self.assertEqual(
+            _ism_sample_ids("ACGT", positions, alt_indices).shape, (0, 3))
+
+    def test_ism_sample_ids_matches_ism_sample_id(self):
+        sequence = "ATNCGGTNA"
+        for mutate_n_bases, start, end in [(1, 0, 9), (2, 2, 7), (3, 1, 8)]:
+            positions, alt_indices = _ism_mutation_arrays(
+                sequence, mutate_n_bases=mutate_n_bases,
+                start_position=start, end_position=end)
+            observed = _ism_sample_ids(sequence, positions, alt_indices)
+            mutations = in_silico_mutagenesis_sequences(
+                sequence, mutate_n_bases=mutate_n_bases,
+                start_position=start, end_position=end)
+            expected = [list(_ism_sample_id(sequence, m)) for m in mutations]
+            self.assertListEqual(observed.tolist(), expected)
+
+
+class _LuaStyleModel(nn.Module):
+    # models converted from Lua Torch take 4-D inputs and use `Conv2d`
+
+    def __init__(self, sequence_length, n_features):
+        super(_LuaStyleModel, self).__init__()
+        self.conv = nn.Conv2d(4, 2, (1, 3))
+        self.linear = nn.Linear(2 * (sequence_length - 2), n_features)
+
+    def forward(self, x):
+        out = self.conv(x)
+        return torch.sigmoid(self.linear(out.view(out.size(0), -1)))
+
+
+class TestAnalyzeSequences(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.sequence_length = 8
+        self.features = ["f0", "f1"]
+        self.model = _LuaStyleModel(self.sequence_length, len(self.features))
+        self.model_path = os.path.join(self.output_dir, "model.pth")
+        torch.save(self.model.state_dict(), self.model_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+        Genome.update_bases_order(['A', 'C', 'G', 'T'])
+
+    def test_lua_model_with_jit_and_data_parallel(self):
+        analysis = AnalyzeSequences(
+            self.model,
+            self.model_path,
+            self.sequence_length,
+            self.features,
+            batch_size=4,
+            data_parallel=True,
+            use_jit=True)
+        self.assertTrue(_is_lua_trained_model(analysis.model))
+
+        analysis.in_silico_mutagenesis(
+            "ACGTACGT", save_data=["predictions"],
+            output_path_prefix=os.path.join(self.output_dir, "ism"))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.output_dir, "ism_predictions.tsv")))
+
+    def test_in_silico_mutagenesis_predict_empty_mutations_list(self):
+        analysis = AnalyzeSequences(
+            self.model,
+            self.model_path,
+            self.sequence_length,
+            self.features,
+            batch_size=4)
+        output_path_prefix = os.path.join(self.output_dir, "ism")
+        reporters = analysis._initialize_reporters(
+            ["predictions"], output_path_prefix, "tsv", ISM_COLS)
+        analysis.in_silico_mutagenesis_predict(
+            "ACGTACGT", None, [], reporters=reporters)
+
+        with open("{0}_predictions.tsv".format(output_path_prefix)) as fh:
+            lines = fh.read().splitlines()
+        self.assertListEqual(lines, ['\t'.join(ISM_COLS + self.features)])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -83,6 +83,28 @@ class BedFileSampler(FileSampler):
         self.n_features = n_features
         self.n_samples = n_samples
 
+        # only every `_world_size`-th line, starting at line `_rank`, is
+        # used. See `shard`.
+        self._rank = 0
+        self._world_size = 1
+        self._line_index = -1
+
+    def shard(self, rank, world_size):
+        """
+        Restricts sampling to every `world_size`-th line of the file,
+        starting at line `rank`, so that the shards are disjoint.
+
+        Parameters
+        ----------
+        rank : int
+            The index of this process, in `[0, world_size)`.
+        world_size : int
+            The total number of processes.
+
+        """
+        self._rank = rank
+        self._world_size = world_size
+
     def sample(self, batch_size=1):
         """
         Draws a mini-batch of examples and their corresponding
@@ -113,12 +135,16 @@ class BedFileSampler(FileSampler):
             targets = []
         while len(sequences) < batch_size:
             line = self._file_handle.readline()
+            self._line_index += 1
             if not line:
                 # TODO: add functionality to shuffle the file if sampler
                 # reaches the end of the file.
                 self._file_handle.close()
                 self._file_handle = open(self.filepath, 'r')
                 line = self._file_handle.readline()
+                self._line_index = 0
+            if self._line_index % self._world_size != self._rank:
+                continue
             cols = line.split('\t')
             chrom = cols[0]
             start = int(cols[1])
@@ -249,5 +275,9 @@ class BedFileSampler(FileSampler):
         seqs, tgts = self.sample(batch_size=remainder)
         sequences_and_targets.append((seqs, tgts))
         targets_mat.append(tgts)
-        targets_mat = np.vstack(targets_mat).astype(int)
+        if len(targets_mat) == 1:
+            targets_mat = targets_mat[0].astype(int, copy=False)
+        else:
+            targets_mat = np.concatenate(targets_mat, axis=0).astype(
+                int, copy=False)
         return sequences_and_targets, targets_mat
@@ -69,3 +69,25 @@ class FileSampler(metaclass=ABCMeta):
 
         """
         raise NotImplementedError()
+
+    def shard(self, rank, world_size):
+        """
+        Restricts the examples drawn by this sampler to the disjoint
+        shard used by process `rank` of `world_size` processes.
+
+        Parameters
+        ----------
+        rank : int
+            The index of this process, in `[0, world_size)`.
+        world_size : int
+            The total number of processes.
+
+        Raises
+        ------
+        NotImplementedError
+            If the sampler does not support sharding.
+
+        """
+        raise NotImplementedError(
+            "{0} does not support sharding its data across "
+            "processes.".format(type(self).__name__))
@@ -113,6 +113,30 @@ class MatFileSampler(FileSampler):
         if self._shuffle:
             np.random.shuffle(self._sample_indices)
 
+    def shard(self, rank, world_size):
+        """
+        Restricts sampling to every `world_size`-th example in the
+        matrix, starting at example `rank`, so that the shards are
+        disjoint. Each process shuffles its own shard (if `shuffle` is
+        True), so the order in which examples are drawn differs between
+        processes.
+
+        Parameters
+        ----------
+        rank : int
+            The index of this process, in `[0, world_size)`.
+        world_size : int
+            The total number of processes.
+
+        """
+        # the examples are sharded in their original order: each process
+        # has already shuffled `_sample_indices` independently
+        self._sample_indices = np.arange(
+            self.n_samples)[rank::world_size].tolist()
+        self._sample_next = 0
+        if self._shuffle:
+            np.random.shuffle(self._sample_indices)
+
     def sample(self, batch_size=1):
         """
         Draws a mini-batch of examples and their corresponding
@@ -251,5 +275,9 @@ class MatFileSampler(FileSampler):
         sequences_and_targets.append((seqs, tgts))
         targets_mat.append(tgts)
         # TODO: should not assume targets are always integers
-        targets_mat = np.vstack(targets_mat).astype(float)
+        if len(targets_mat) == 1:
+            targets_mat = targets_mat[0].astype(float, copy=False)
+        else:
+            targets_mat = np.concatenate(targets_mat, axis=0).astype(
+                float, copy=False)
         return sequences_and_targets, targets_mat
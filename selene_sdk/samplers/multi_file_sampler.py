@@ -100,6 +100,27 @@ class MultiFileSampler(Sampler):
                 "{1}".format(mode, self.modes))
         self.mode = mode
 
+    def shard(self, rank, world_size):
+        """
+        Restricts the training file sampler to the examples used by
+        process `rank` of `world_size` processes. The validation and
+        test samplers are not sharded.
+
+        Parameters
+        ----------
+        rank : int
+            The index of this process, in `[0, world_size)`.
+        world_size : int
+            The total number of processes.
+
+        Raises
+        ------
+        NotImplementedError
+            If the training file sampler does not support sharding.
+
+        """
+        self._samplers["train"].shard(rank, world_size)
+
     def get_feature_from_index(self, index):
         """
         Returns the feature corresponding to an index in the feature
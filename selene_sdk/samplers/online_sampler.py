@@ -208,6 +208,27 @@ class OnlineSampler(Sampler, metaclass=ABCMeta):
 
         self._save_filehandles = {}
 
+    def shard(self, rank, world_size):
+        """
+        Gives process `rank` of `world_size` processes its own stream of
+        training examples. Online samplers draw examples at random (with
+        replacement), so rather than partitioning the training data,
+        each process reseeds the random number generators with
+        `seed + rank` and redraws its cache of training indices.
+
+        Parameters
+        ----------
+        rank : int
+            The index of this process, in `[0, world_size)`.
+        world_size : int
+            The total number of processes.
+
+        """
+        np.random.seed(self.seed + rank)
+        random.seed(self.seed + rank + 1)
+        if hasattr(self, "_update_randcache"):
+            self._update_randcache(mode="train")
+
     def get_feature_from_index(self, index):
         """
         Returns the feature corresponding to an index in the feature
@@ -330,7 +351,11 @@ class OnlineSampler(Sampler, metaclass=ABCMeta):
         for _ in range(n_batches):
             inputs, targets = self.sample(batch_size)
             sequences_and_targets.append((inputs, targets))
-        targets_mat = np.vstack([t for (s, t) in sequences_and_targets])
+        targets_mat = [t for (s, t) in sequences_and_targets]
+        if len(targets_mat) == 1:
+            targets_mat = targets_mat[0]
+        else:
+            targets_mat = np.concatenate(targets_mat, axis=0)
         if mode in self._save_datasets:
             self.save_dataset_to_file(mode, close_filehandle=True)
         return sequences_and_targets, targets_mat
@@ -206,3 +206,26 @@ class Sampler(metaclass=ABCMeta):
 
         """
         raise NotImplementedError()
+
+    def shard(self, rank, world_size):
+        """
+        Restricts the training examples drawn by this sampler to the
+        shard used by process `rank` of `world_size` processes, so that
+        each process in distributed training draws different examples.
+
+        Parameters
+        ----------
+        rank : int
+            The index of this process, in `[0, world_size)`.
+        world_size : int
+            The total number of processes.
+
+        Raises
+        ------
+        NotImplementedError
+            If the sampler does not support sharding its training data.
+
+        """
+        raise NotImplementedError(
+            "{0} does not support sharding its training data across "
+            "processes.".format(type(self).__name__))
@@ -106,16 +106,14 @@ def get_reverse_encoding(encoding,
 
     """
 
+    complement_indices = [
+        base_to_index[complementary_base_dict[b]] for b in bases_arr]
+    reversed_encoding = encoding[::-1]
     reverse_encoding = np.zeros(encoding.shape)
-    for index, row in enumerate(encoding):
-        base_pos = _get_base_index(row)
-        if base_pos == -1:
-            reverse_encoding[index, :] = 1 / len(bases_arr)
-        else:
-            base = complementary_base_dict[bases_arr[base_pos]]
-            complem_base_pos = base_to_index[base]
-            rev_index = encoding.shape[0] - row - 1
-            reverse_encoding[rev_index, complem_base_pos] = 1
+    reverse_encoding[:, complement_indices] = reversed_encoding == 1
+    # rows without a known base are set to the unknown base encoding
+    has_base = np.any(reversed_encoding == 1, axis=1)
+    reverse_encoding[~has_base, :] = 1 / len(bases_arr)
     return reverse_encoding
 
 
@@ -136,9 +134,7 @@ def reverse_complement_sequence(sequence, complementary_base_dict):
         The reverse complement of the input sequence.
 
     """
-    rev_comp_bases = [complementary_base_dict[b] for b in
-                      sequence[::-1]]
-    return ''.join(rev_comp_bases)
+    return sequence[::-1].translate(str.maketrans(complementary_base_dict))
 
 
 class Sequence(metaclass=ABCMeta):
@@ -4,7 +4,7 @@ import numpy as np
 
 from selene_sdk.sequences.genome import _get_sequence_from_coords
 from selene_sdk.sequences.sequence import sequence_to_encoding, \
-    encoding_to_sequence
+    encoding_to_sequence, get_reverse_encoding, reverse_complement_sequence
 
 
 class TestGenome(unittest.TestCase):
@@ -16,6 +16,11 @@ class TestGenome(unittest.TestCase):
             'a': 0, 'c': 1, 'g': 2, 't': 3,
         }
 
+        self.complementary_base_dict = {
+            'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A', 'N': 'N',
+            'a': 'T', 'c': 'G', 'g': 'C', 't': 'A', 'n': 'N'
+        }
+
         self.len_chrs = {
             "chr1": 104,
             "chr2": 16,
@@ -77,6 +82,23 @@ class TestGenome(unittest.TestCase):
         expected = "GNATNN"
         self.assertEqual(observed, expected)
 
+    def test_reverse_complement_sequence(self):
+        observed = reverse_complement_sequence(
+            "AAcGTn", self.complementary_base_dict)
+        self.assertEqual(observed, "NACGTT")
+
+    def test_get_reverse_encoding(self):
+        encoding = np.array([
+            [1., 0., 0., 0.], [0.25, 0.25, 0.25, 0.25],
+            [0., 0., 1., 0.], [0., 0., 0., 1.]])  # ANGT
+        observed = get_reverse_encoding(
+            encoding, self.bases_arr, self.bases_encoding,
+            self.complementary_base_dict)
+        expected = np.array([
+            [1., 0., 0., 0.], [0., 1., 0., 0.],
+            [0.25, 0.25, 0.25, 0.25], [0., 0., 0., 1.]])  # ACNT
+        self.assertSequenceEqual(observed.tolist(), expected.tolist())
+
     def test__get_sequence_from_coords_pos_strand(self):
         observed = _get_sequence_from_coords(
             self.len_chrs, self._genome_sequence, "chr1", 0, 14, '+')
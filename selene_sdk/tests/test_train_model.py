@@ -0,0 +1,181 @@
+"""
+Test methods in the train_model module
+"""
+import copy
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from selene_sdk.train_model import TrainModel
+from selene_sdk.train_model import _BatchPrefetcher
+
+
+class _CountingSampler(object):
+    """
+    Returns batches whose values are the index of the batch, and raises
+    `error` on batch `fail_at` (if specified).
+    """
+
+    def __init__(self, fail_at=None, error=None):
+        self.n_sampled = 0
+        self.mode = None
+        self._fail_at = fail_at
+        self._error = error
+        self._lock = threading.Lock()
+
+    def set_mode(self, mode):
+        self.mode = mode
+
+    def sample(self, batch_size=1):
+        with self._lock:
+            index = self.n_sampled
+            self.n_sampled += 1
+        if index == self._fail_at:
+            raise self._error
+        inputs = np.full((batch_size, 4, 5), index, dtype=np.float32)
+        targets = np.full((batch_size, 2), index, dtype=np.float32)
+        return inputs, targets
+
+
+class TestBatchPrefetcher(unittest.TestCase):
+
+    def test_batches_in_sampled_order(self):
+        sampler = _CountingSampler()
+        prefetcher = _BatchPrefetcher(sampler, 3, 2, 6)
+        for index in range(6):
+            inputs, targets = prefetcher.get()
+            self.assertEqual(tuple(inputs.shape), (3, 4, 5))
+            self.assertEqual(tuple(targets.shape), (3, 2))
+            self.assertTrue((inputs == index).all())
+            self.assertTrue((targets == index).all())
+        prefetcher.close()
+        self.assertEqual(sampler.mode, "train")
+
+    def test_samples_at_most_max_batches(self):
+        sampler = _CountingSampler()
+        prefetcher = _BatchPrefetcher(sampler, 2, 8, 5)
+        for _ in range(5):
+            prefetcher.get()
+        # the background thread exits once `max_batches` are sampled
+        prefetcher._thread.join(10)
+        self.assertFalse(prefetcher._thread.is_alive())
+        self.assertEqual(sampler.n_sampled, 5)
+        prefetcher.close()
+
+    def test_sampler_error_raised_by_get(self):
+        sampler = _CountingSampler(fail_at=2, error=ValueError("bad batch"))
+        prefetcher = _BatchPrefetcher(sampler, 2, 4, 10)
+        prefetcher.get()
+        prefetcher.get()
+        with self.assertRaises(ValueError):
+            prefetcher.get()
+        prefetcher.close()
+
+    def test_close_stops_sampling(self):
+        sampler = _CountingSampler()
+        prefetcher = _BatchPrefetcher(sampler, 2, 2, 100)
+        prefetcher.get()
+        prefetcher.close()
+        self.assertFalse(prefetcher._thread.is_alive())
+        # one batch was consumed, the queue held 2 and at most 1 more
+        # was waiting to be queued
+        self.assertLessEqual(sampler.n_sampled, 4)
+
+
+class _FixedDataSampler(object):
+    """
+    Returns consecutive slices of a fixed set of examples, starting
+    over once all of them have been returned.
+    """
+
+    modes = ["train", "validate"]
+
+    def __init__(self, n_examples=8, sequence_length=10, n_features=3):
+        random_state = np.random.RandomState(0)
+        self.mode = "train"
+        self.sequences = np.eye(4, dtype=np.float32)[
+            random_state.randint(0, 4, (n_examples, sequence_length))]
+        self.targets = (random_state.rand(n_examples, n_features) > 0.5
+                        ).astype(np.float32)
+        self._next = 0
+
+    def set_mode(self, mode):
+        self.mode = mode
+
+    def sample(self, batch_size=1):
+        indices = np.arange(self._next, self._next + batch_size) % \
+            len(self.sequences)
+        self._next = (self._next + batch_size) % len(self.sequences)
+        return self.sequences[indices], self.targets[indices]
+
+    def get_validation_set(self, batch_size, n_samples=None):
+        data = [(self.sequences, self.targets)]
+        return data, self.targets
+
+    def get_feature_from_index(self, index):
+        return "f{0}".format(index)
+
+    def save_dataset_to_file(self, *args, **kwargs):
+        pass
+
+
+class TestTrainModel(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        torch.manual_seed(0)
+        self.model = nn.Sequential(
+            nn.Conv1d(4, 3, 10), nn.Flatten(), nn.Sigmoid())
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def _trainer(self, batch_size, gradient_accumulation_steps):
+        return TrainModel(
+            copy.deepcopy(self.model),
+            _FixedDataSampler(),
+            nn.BCELoss(),
+            torch.optim.SGD,
+            {"lr": 0.5},
+            batch_size,
+            1,
+            1,
+            self.output_dir,
+            report_gt_feature_n_positives=0,
+            prefetch_batches=0,
+            gradient_accumulation_steps=gradient_accumulation_steps,
+            logging_verbosity=0)
+
+    def test_gradient_accumulation_matches_larger_batch(self):
+        accumulated = self._trainer(2, 4)
+        single_batch = self._trainer(8, 1)
+        accumulated_loss = accumulated.train()
+        single_batch_loss = single_batch.train()
+
+        self.assertAlmostEqual(
+            accumulated_loss.item(), single_batch_loss.item(), places=5)
+        for accumulated_param, single_batch_param in zip(
+                accumulated.model.parameters(),
+                single_batch.model.parameters()):
+            np.testing.assert_allclose(
+                accumulated_param.detach().numpy(),
+                single_batch_param.detach().numpy(),
+                rtol=1e-5, atol=1e-6)
+        # the update is not trivially zero
+        for param, initial_param in zip(
+                single_batch.model.parameters(), self.model.parameters()):
+            self.assertFalse(torch.equal(param, initial_param))
+
+    def test_gradient_accumulation_steps_below_1_rejected(self):
+        for gradient_accumulation_steps in [0, -1]:
+            with self.assertRaises(ValueError):
+                self._trainer(2, gradient_accumulation_steps)
+
+
+if __name__ == "__main__":
+    unittest.main()
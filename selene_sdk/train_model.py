@@ -1,17 +1,22 @@
 """
 This module provides the `TrainModel` class and supporting methods.
 """
+import contextlib
 import logging
 import math
 import os
+import queue
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from time import strftime
 from time import time
 
 import numpy as np
 import torch
+import torch.distributed as dist
 import torch.nn as nn
-from torch.autograd import Variable
+from torch.nn.parallel import DistributedDataParallel
 from torch.optim.lr_scheduler import ReduceLROnPlateau
 from sklearn.metrics import roc_auc_score
 from sklearn.metrics import average_precision_score
@@ -34,6 +39,159 @@ def _metrics_logger(name, out_filepath):
     return logger
 
 
+def _autocast(enabled):
+    """
+    Returns the context manager under which the forward pass is
+    computed. When `enabled`, this is `torch.cuda.amp.autocast`;
+    otherwise it is a no-op context. The loss is computed outside of
+    it, in single precision: losses such as `nn.BCELoss` are not
+    supported under autocast.
+
+    """
+    if enabled:
+        return torch.cuda.amp.autocast()
+    return contextlib.ExitStack()
+
+
+def _as_tensor(array):
+    """
+    Wraps a numpy array in a float32 tensor. The tensor shares memory
+    with `array` if it is already a C-contiguous float32 array, so no
+    copy is made in the common case.
+
+    """
+    return torch.from_numpy(np.ascontiguousarray(array, dtype=np.float32))
+
+
+def _copy_to_cpu(obj):
+    """
+    Recursively copies the tensors in a (nested) checkpoint state to
+    the CPU, so that the copy is unaffected by further training.
+
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().cpu().clone()
+    elif isinstance(obj, dict):
+        return type(obj)((k, _copy_to_cpu(v)) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        return type(obj)(_copy_to_cpu(v) for v in obj)
+    return obj
+
+
+def _write_checkpoint(state, checkpoint_filepath, best_filepath=None):
+    """
+    Saves the checkpoint `state` to `checkpoint_filepath` and, if
+    `best_filepath` is not None, copies it to `best_filepath`.
+
+    """
+    torch.save(state, checkpoint_filepath)
+    if best_filepath is not None:
+        shutil.copyfile(checkpoint_filepath, best_filepath)
+
+
+class _BatchPrefetcher(object):
+    """
+    Samples training mini-batches on a background thread, so that
+    sampling the next batches overlaps with the forward and backward
+    passes on the current batch. Batches are converted to tensors
+    (in page-locked memory, if requested) before they are queued, so
+    that they can be copied to the GPU asynchronously.
+
+    The batches are returned in the order the sampler produced them,
+    and no more than `max_batches` batches are sampled in total. Note
+    that batches are sampled (and, for samplers that save their
+    datasets, recorded) up to `n_batches + 1` batches before they are
+    used.
+
+    Parameters
+    ----------
+    sampler : selene_sdk.samplers.Sampler
+        The example generator. It should not be used by any other
+        thread until `close` is called.
+    batch_size : int
+        The size of the mini-batches to sample.
+    n_batches : int
+        The maximum number of sampled batches held in the queue.
+    max_batches : int
+        The total number of batches to sample.
+    pin_memory : bool, optional
+        Default is `False`. Whether to copy batches to page-locked memory.
+
+    """
+
+    def __init__(self,
+                 sampler,
+                 batch_size,
+                 n_batches,
+                 max_batches,
+                 pin_memory=False):
+        self._sampler = sampler
+        self._batch_size = batch_size
+        self._max_batches = max_batches
+        self._pin_memory = pin_memory
+        # like the pin-memory thread of `torch.utils.data.DataLoader`,
+        # the background thread uses the current device, instead of
+        # creating a CUDA context on the default device
+        self._device = None
+        if self._pin_memory:
+            self._device = torch.cuda.current_device()
+        self._queue = queue.Queue(maxsize=n_batches)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            if self._device is not None:
+                torch.cuda.set_device(self._device)
+            self._sampler.set_mode("train")
+            for _ in range(self._max_batches):
+                if self._stop.is_set():
+                    return
+                inputs, targets = self._sampler.sample(
+                    batch_size=self._batch_size)
+                inputs = _as_tensor(inputs)
+                targets = _as_tensor(targets)
+                if self._pin_memory:
+                    inputs = inputs.pin_memory()
+                    targets = targets.pin_memory()
+                self._put((inputs, targets))
+        except Exception as e:
+            # re-raised on the training thread by `get`
+            self._put(e)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(self):
+        """
+        Waits for the next sampled mini-batch.
+
+        Returns
+        -------
+        tuple(torch.Tensor, torch.Tensor)
+            A tuple containing the examples and targets.
+
+        """
+        item = self._queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def close(self):
+        """
+        Stops sampling and waits for the background thread to exit.
+
+        """
+        self._stop.set()
+        self._thread.join()
+
+
 class TrainModel(object):
     """
     This class ties together the various objects and methods needed to
@@ -116,6 +274,25 @@ class TrainModel(object):
               exists), we will use all the test samples available in the
               appropriate data file.
 
+    prefetch_batches : int, optional
+        Default is 2. The number of training mini-batches that are sampled
+        ahead of time on a background thread while the model trains on the
+        current mini-batch. Set to 0 to sample each mini-batch on demand.
+        Mini-batches are trained on in the order they are sampled, and
+        no more are sampled than training uses. However, at any point
+        during training (e.g. when a checkpoint is saved) up to
+        `prefetch_batches + 1` mini-batches may already have been
+        sampled, and recorded by samplers that save the training
+        dataset, without having been trained on yet. If training stops
+        early (e.g. on an error), those mini-batches are never trained
+        on.
+    gradient_accumulation_steps : int, optional
+        Default is 1. The number of mini-batches whose gradients are
+        accumulated before each optimizer step. Each step then trains on
+        `gradient_accumulation_steps * batch_size` examples, without
+        needing the memory for the larger batch. The training loss
+        reported is the average over these mini-batches. Must be at
+        least 1.
     cpu_n_threads : int, optional
         Default is 1. Sets the number of OpenMP threads used for parallelizing
         CPU operations.
@@ -124,7 +301,27 @@ class TrainModel(object):
         for torch to use during training.
     data_parallel : bool, optional
         Default is `False`. Specify whether multiple GPUs are available
-        for torch to use during training.
+        for torch to use during training. Validation and test predictions
+        are still made on a single GPU.
+    distributed : bool, optional
+        Default is `False`. Only used if `use_cuda` is `True`. Train with
+        `torch.nn.parallel.DistributedDataParallel`, using one process per
+        GPU and the NCCL backend. The processes must be started by a
+        launcher that sets the `torch.distributed` environment variables,
+        e.g. `torchrun --nproc_per_node=<n_gpus> selene_cli.py <config>`.
+        Each process trains on its own shard of the training data (see
+        `selene_sdk.samplers.Sampler.shard`); samplers that cannot be
+        sharded raise a `ValueError`. Only the process with rank 0
+        creates the validation set, reports statistics and saves
+        checkpoints. Takes precedence over `data_parallel`.
+    mixed_precision : bool, optional
+        Default is `False`. Only used if `use_cuda` is `True`. Run the
+        forward pass under `torch.cuda.amp.autocast` and scale the loss
+        with a `torch.cuda.amp.GradScaler` during backpropagation. The
+        loss itself is computed in single precision. Requires PyTorch
+        1.6 or later, which is newer than the versions Selene declares
+        as dependencies (`torch<=1.4.0`), so this option cannot be used
+        with a default installation and raises a `ValueError` there.
     logging_verbosity : {0, 1, 2}, optional
         Default is 2. Set the logging verbosity level.
 
@@ -160,6 +357,10 @@ class TrainModel(object):
         If `True`, use a CUDA-enabled GPU. If `False`, use the CPU.
     data_parallel : bool
         Whether to use multiple GPUs or not.
+    distributed : bool
+        Whether to use multiple GPUs, each in its own process, or not.
+    mixed_precision : bool
+        Whether to train with automatic mixed precision or not.
     output_dir : str
         The directory to save model checkpoints and logs.
     training_loss : list(float)
@@ -187,9 +388,13 @@ class TrainModel(object):
                  report_gt_feature_n_positives=10,
                  n_validation_samples=None,
                  n_test_samples=None,
+                 prefetch_batches=2,
+                 gradient_accumulation_steps=1,
                  cpu_n_threads=1,
                  use_cuda=False,
                  data_parallel=False,
+                 distributed=False,
+                 mixed_precision=False,
                  logging_verbosity=2,
                  checkpoint_resume=None,
                  metrics=dict(roc_auc=roc_auc_score,
@@ -213,6 +418,17 @@ class TrainModel(object):
             self.nth_step_save_checkpoint = save_checkpoint_every_n_steps
 
         self.save_new_checkpoints = save_new_checkpoints_after_n_steps
+        if gradient_accumulation_steps < 1:
+            raise ValueError(
+                "`gradient_accumulation_steps` must be at least 1, but "
+                "found {0}.".format(gradient_accumulation_steps))
+        self._prefetch_batches = prefetch_batches
+        # checkpoints are written to disk on a background thread, one
+        # at a time
+        self._checkpoint_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_checkpoint = None
+        self._gradient_accumulation_steps = gradient_accumulation_steps
+        self._prefetcher = None
 
         logger.info("Training parameters set: batch size {0}, "
                     "number of steps per 'epoch': {1}, "
@@ -225,24 +441,67 @@ class TrainModel(object):
 
         self.use_cuda = use_cuda
         self.data_parallel = data_parallel
-
-        if self.data_parallel:
+        self.distributed = distributed
+
+        self._rank = 0
+        if self.distributed:
+            if not self.use_cuda:
+                raise ValueError("`distributed` training requires "
+                                 "`use_cuda` to be True.")
+            dist.init_process_group(backend="nccl")
+            self._rank = dist.get_rank()
+            local_rank = int(os.environ.get("LOCAL_RANK", 0))
+            torch.cuda.set_device(local_rank)
+            self.model = DistributedDataParallel(
+                model.cuda(local_rank), device_ids=[local_rank])
+            self.criterion.cuda()
+            logger.debug("Wrapped model in DistributedDataParallel "
+                         "(rank {0})".format(self._rank))
+        elif self.data_parallel:
             self.model = nn.DataParallel(model)
             logger.debug("Wrapped model in DataParallel")
 
-        if self.use_cuda:
+        if self.use_cuda and not self.distributed:
             self.model.cuda()
             self.criterion.cuda()
             logger.debug("Set modules to use CUDA")
 
+        if self.use_cuda:
+            # the input shape is the same for every training step, so
+            # cuDNN can pick the fastest convolution algorithms once
+            # and reuse them
+            torch.backends.cudnn.benchmark = True
+
+        self.mixed_precision = mixed_precision and self.use_cuda
+        self._scaler = None
+        if self.mixed_precision:
+            if not hasattr(torch.cuda, "amp"):
+                raise ValueError(
+                    "`mixed_precision` requires PyTorch 1.6 or later, but "
+                    "found PyTorch {0}.".format(torch.__version__))
+            self._scaler = torch.cuda.amp.GradScaler()
+            logger.debug("Using automatic mixed precision")
+
         os.makedirs(output_dir, exist_ok=True)
         self.output_dir = output_dir
 
+        if self._rank != 0:
+            logging_verbosity = 0
         initialize_logger(
             os.path.join(self.output_dir, "{0}.log".format(__name__)),
             verbosity=logging_verbosity)
 
-        self._create_validation_set(n_samples=n_validation_samples)
+        if self._rank == 0:
+            self._create_validation_set(n_samples=n_validation_samples)
+        if self.distributed:
+            # each process trains on its own shard of the training data
+            try:
+                self.sampler.shard(self._rank, dist.get_world_size())
+            except NotImplementedError as e:
+                raise ValueError(
+                    "`distributed` training requires a sampler that can "
+                    "shard its training data across processes: {0}".format(
+                        e))
         self._validation_metrics = PerformanceMetrics(
             self.sampler.get_feature_from_index,
             report_gt_feature_n_positives=report_gt_feature_n_positives,
@@ -287,14 +546,15 @@ class TrainModel(object):
                 ("Resuming from checkpoint: step {0}, min loss {1}").format(
                     self._start_step, self._min_loss))
 
-        self._train_logger = _metrics_logger(
-                "{0}.train".format(__name__), self.output_dir)
-        self._validation_logger = _metrics_logger(
-                "{0}.validation".format(__name__), self.output_dir)
+        if self._rank == 0:
+            self._train_logger = _metrics_logger(
+                    "{0}.train".format(__name__), self.output_dir)
+            self._validation_logger = _metrics_logger(
+                    "{0}.validation".format(__name__), self.output_dir)
 
-        self._train_logger.info("loss")
-        self._validation_logger.info("\t".join(["loss"] +
-            sorted([x for x in self._validation_metrics.metrics.keys()])))
+            self._train_logger.info("loss")
+            self._validation_logger.info("\t".join(["loss"] +
+                sorted([x for x in self._validation_metrics.metrics.keys()])))
 
     def _create_validation_set(self, n_samples=None):
         """
@@ -325,9 +585,12 @@ class TrainModel(object):
         We do not create the test set in the `TrainModel` object until
         this method is called, so that we avoid having to load it into
         memory until the model has been trained and is ready to be
-        evaluated.
+        evaluated. In distributed training, only the rank 0 process
+        loads the test set.
 
         """
+        if self._rank != 0:
+            return
         logger.info("Creating test dataset.")
         t_i = time()
         self._test_data, self._all_test_targets = \
@@ -345,17 +608,24 @@ class TrainModel(object):
 
     def _get_batch(self):
         """
-        Fetches a mini-batch of examples
+        Fetches a mini-batch of examples, either from the background
+        prefetching thread (during `train_and_validate`) or directly
+        from the sampler.
 
         Returns
         -------
-        tuple(numpy.ndarray, numpy.ndarray)
+        tuple(torch.Tensor, torch.Tensor)
             A tuple containing the examples and targets.
 
         """
         t_i_sampling = time()
-        batch_sequences, batch_targets = self.sampler.sample(
-            batch_size=self.batch_size)
+        if self._prefetcher is not None:
+            batch_sequences, batch_targets = self._prefetcher.get()
+        else:
+            batch_sequences, batch_targets = self.sampler.sample(
+                batch_size=self.batch_size)
+            batch_sequences = _as_tensor(batch_sequences)
+            batch_targets = _as_tensor(batch_targets)
         t_f_sampling = time()
         logger.debug(
             ("[BATCH] Time to sample {0} examples: {1} s.").format(
@@ -376,14 +646,51 @@ class TrainModel(object):
             verbose=True,
             factor=0.8)
 
+        if self._prefetch_batches:
+            # sample exactly the batches that the remaining steps train
+            # on, so that every batch sampled (and saved to the train
+            # dataset file, if requested) is trained on
+            self._prefetcher = _BatchPrefetcher(
+                self.sampler,
+                self.batch_size,
+                self._prefetch_batches,
+                (self.max_steps - self._start_step) *
+                self._gradient_accumulation_steps,
+                pin_memory=self.use_cuda)
+        try:
+            self._train_and_validate_steps(min_loss, scheduler)
+        finally:
+            if self._prefetcher is not None:
+                self._prefetcher.close()
+                self._prefetcher = None
+            self._wait_for_checkpoint()
+        if self._rank == 0:
+            self.sampler.save_dataset_to_file("train", close_filehandle=True)
+
+    def _train_and_validate_steps(self, min_loss, scheduler):
+        """
+        Runs the training steps from `train_and_validate`, reporting
+        statistics and saving checkpoints along the way.
+
+        Parameters
+        ----------
+        min_loss : float
+            The lowest validation loss seen so far.
+        scheduler : torch.optim.lr_scheduler.ReduceLROnPlateau
+            The learning rate scheduler, updated after each validation.
+
+        """
         time_per_step = []
+        # the training losses stay on the device until they are
+        # reported, so that steps do not wait on a device-to-host copy
+        train_losses = []
         for step in range(self._start_step, self.max_steps):
             t_i = time()
-            train_loss = self.train()
+            train_losses.append(self.train())
             t_f = time()
             time_per_step.append(t_f - t_i)
 
-            if step % self.nth_step_save_checkpoint == 0:
+            if self._rank == 0 and step % self.nth_step_save_checkpoint == 0:
                 checkpoint_dict = {
                     "step": step,
                     "arch": self.model.__class__.__name__,
@@ -405,23 +712,30 @@ class TrainModel(object):
 
             # TODO: Should we have some way to report training stats without running validation?
             if step and step % self.nth_step_report_stats == 0:
-                logger.info(("[STEP {0}] average number "
-                             "of steps per second: {1:.1f}").format(
-                    step, 1. / np.average(time_per_step)))
+                train_loss = torch.stack(train_losses).mean().item()
+                train_losses = []
+                validation_loss = None
+                if self._rank == 0:
+                    logger.info(("[STEP {0}] average number "
+                                 "of steps per second: {1:.1f}").format(
+                        step, 1. / np.average(time_per_step)))
+                    valid_scores = self.validate()
+                    validation_loss = valid_scores["loss"]
+                    self._train_logger.info(train_loss)
+                    to_log = [str(validation_loss)]
+                    for k in sorted(self._validation_metrics.metrics.keys()):
+                        if k in valid_scores and valid_scores[k]:
+                            to_log.append(str(valid_scores[k]))
+                        else:
+                            to_log.append("NA")
+                    self._validation_logger.info("\t".join(to_log))
                 time_per_step = []
-                valid_scores = self.validate()
-                validation_loss = valid_scores["loss"]
-                self._train_logger.info(train_loss)
-                to_log = [str(validation_loss)]
-                for k in sorted(self._validation_metrics.metrics.keys()):
-                    if k in valid_scores and valid_scores[k]:
-                        to_log.append(str(valid_scores[k]))
-                    else:
-                        to_log.append("NA")
-                self._validation_logger.info("\t".join(to_log))
+                if self.distributed:
+                    validation_loss = self._broadcast_from_main_process(
+                        validation_loss)
                 scheduler.step(math.ceil(validation_loss * 1000.0) / 1000.0)
 
-                if validation_loss < min_loss:
+                if self._rank == 0 and validation_loss < min_loss:
                     min_loss = validation_loss
                     self._save_checkpoint({
                         "step": step,
@@ -435,40 +749,81 @@ class TrainModel(object):
 
                 # Logging training and validation on same line requires 2 parsers or more complex parser.
                 # Separate logging of train/validate is just a grep for validation/train and then same parser.
-        self.sampler.save_dataset_to_file("train", close_filehandle=True)
 
-    def train(self):
+    def _broadcast_from_main_process(self, value):
         """
-        Trains the model on a batch of data.
+        Shares a scalar computed by the rank 0 process (e.g. the
+        validation loss) with all other processes, so that they make
+        the same decisions (e.g. learning rate updates).
+
+        Parameters
+        ----------
+        value : float or None
+            The value on the rank 0 process. Ignored on all other
+            processes.
 
         Returns
         -------
         float
-            The training loss.
+            The value from the rank 0 process.
 
         """
-        self.model.train()
-        self.sampler.set_mode("train")
+        value = torch.tensor(
+            [value if self._rank == 0 else 0.], device="cuda")
+        dist.broadcast(value, src=0)
+        return value.item()
 
-        inputs, targets = self._get_batch()
-        inputs = torch.Tensor(inputs)
-        targets = torch.Tensor(targets)
-
-        if self.use_cuda:
-            inputs = inputs.cuda()
-            targets = targets.cuda()
+    def train(self):
+        """
+        Trains the model on a batch of data, or on
+        `gradient_accumulation_steps` batches of data with a single
+        optimizer step.
 
-        inputs = Variable(inputs)
-        targets = Variable(targets)
+        Returns
+        -------
+        torch.Tensor
+            The training loss, as a detached scalar tensor on the
+            device the model is trained on.
 
-        predictions = self.model(inputs.transpose(1, 2))
-        loss = self.criterion(predictions, targets)
+        """
+        self.model.train()
+        self.sampler.set_mode("train")
 
         self.optimizer.zero_grad()
-        loss.backward()
-        self.optimizer.step()
+        total_loss = 0
+        n_steps = self._gradient_accumulation_steps
+        for step in range(n_steps):
+            inputs, targets = self._get_batch()
+
+            if self.use_cuda:
+                inputs = inputs.cuda(non_blocking=True)
+                targets = targets.cuda(non_blocking=True)
+
+            # gradients only need to be synchronized across processes
+            # on the last of the accumulated batches
+            sync_context = contextlib.ExitStack()
+            if self.distributed and step < n_steps - 1:
+                sync_context = self.model.no_sync()
+
+            with sync_context:
+                with _autocast(self.mixed_precision):
+                    predictions = self.model(inputs.transpose(1, 2))
+                loss = self.criterion(
+                    predictions.float(), targets) / n_steps
+
+                if self._scaler is not None:
+                    self._scaler.scale(loss).backward()
+                else:
+                    loss.backward()
+            total_loss += loss.detach()
 
-        return loss.item()
+        if self._scaler is not None:
+            self._scaler.step(self.optimizer)
+            self._scaler.update()
+        else:
+            self.optimizer.step()
+
+        return total_loss
 
     def _evaluate_on_data(self, data_in_batches):
         """
@@ -482,36 +837,56 @@ class TrainModel(object):
 
         Returns
         -------
-        tuple(float, list(numpy.ndarray))
-            Returns the average loss, and the list of all predictions.
+        tuple(float, numpy.ndarray)
+            Returns the average loss, and all predictions, of shape
+            :math:`N \\times F` for :math:`N` examples and :math:`F`
+            features.
 
         """
         self.model.eval()
+        # the data-parallel wrappers are bypassed during evaluation:
+        # DistributedDataParallel synchronizes with the other processes
+        # on each forward pass, but only rank 0 evaluates, and the
+        # per-batch replication and scatter/gather of DataParallel costs
+        # more than it saves on (small) evaluation batches
+        model = self.model
+        if self.distributed or self.data_parallel:
+            model = self.model.module
 
         batch_losses = []
-        all_predictions = []
+        # predictions are written into a single buffer on the model's
+        # device (half precision when training with mixed precision)
+        # and copied to the host once, after the last batch
+        n_examples = sum(inputs.shape[0] for (inputs, _) in data_in_batches)
+        all_predictions = None
+        offset = 0
 
         for (inputs, targets) in data_in_batches:
-            inputs = torch.Tensor(inputs)
-            targets = torch.Tensor(targets)
+            inputs = _as_tensor(inputs)
+            targets = _as_tensor(targets)
 
             if self.use_cuda:
                 inputs = inputs.cuda()
                 targets = targets.cuda()
 
             with torch.no_grad():
-                inputs = Variable(inputs)
-                targets = Variable(targets)
-
-                predictions = self.model(inputs.transpose(1, 2))
-                loss = self.criterion(predictions, targets)
-
-                all_predictions.append(
-                    predictions.data.cpu().numpy())
-
-                batch_losses.append(loss.item())
-        all_predictions = np.vstack(all_predictions)
-        return np.average(batch_losses), all_predictions
+                with _autocast(self.mixed_precision):
+                    predictions = model(inputs.transpose(1, 2))
+                loss = self.criterion(predictions.float(), targets)
+
+                if all_predictions is None:
+                    all_predictions = torch.empty(
+                        (n_examples, *predictions.shape[1:]),
+                        dtype=(torch.float16 if self.mixed_precision
+                               else predictions.dtype),
+                        device=predictions.device)
+                n_batch = predictions.shape[0]
+                all_predictions[offset:offset + n_batch] = predictions
+                offset += n_batch
+
+                batch_losses.append(loss.detach())
+        all_predictions = all_predictions.float().cpu().numpy()
+        return torch.stack(batch_losses).mean().item(), all_predictions
 
     def validate(self):
         """
@@ -544,9 +919,13 @@ class TrainModel(object):
         dict
             A dictionary, where keys are the names of the loss metrics,
             and the values are the average value for that metric over
-            the test set.
+            the test set. In distributed training, only the rank 0
+            process evaluates the model and all other processes return
+            `None`.
 
         """
+        if self._rank != 0:
+            return None
         if self._test_data is None:
             self.create_test_set()
         average_loss, all_predictions = self._evaluate_on_data(
@@ -581,7 +960,9 @@ class TrainModel(object):
         Saves snapshot of the model state to file. Will save a checkpoint
         with name `<filename>.pth.tar` and, if this is the model's best
         performance so far, will save the state to a `best_model.pth.tar`
-        file as well.
+        file as well. The files are written on a background thread;
+        the previous checkpoint is always finished before the next
+        one is started.
 
         Models are saved in the state dictionary format. This is a more
         stable format compared to saving the whole model (which is another
@@ -615,11 +996,29 @@ class TrainModel(object):
         """
         logger.debug("[TRAIN] {0}: Saving model state to file.".format(
             state["step"]))
-        cp_filepath = os.path.join(
-            self.output_dir, filename)
-        torch.save(state, "{0}.pth.tar".format(cp_filepath))
+        cp_filepath = "{0}.pth.tar".format(
+            os.path.join(self.output_dir, filename))
+        best_filepath = None
         if is_best:
-            best_filepath = os.path.join(self.output_dir, "best_model")
-            shutil.copyfile("{0}.pth.tar".format(cp_filepath),
-                            "{0}.pth.tar".format(best_filepath))
+            best_filepath = "{0}.pth.tar".format(
+                os.path.join(self.output_dir, "best_model"))
+        # the state is copied on the training thread, so that the
+        # checkpoint is not affected by the training steps taken while
+        # it is written to disk
+        state = _copy_to_cpu(state)
+        self._wait_for_checkpoint()
+        self._pending_checkpoint = self._checkpoint_executor.submit(
+            _write_checkpoint, state, cp_filepath, best_filepath)
+
+    def _wait_for_checkpoint(self):
+        """
+        Blocks until the checkpoint currently being written (if any) is
+        saved. Errors raised while writing the checkpoint are re-raised
+        here.
+
+        """
+        if self._pending_checkpoint is not None:
+            pending, self._pending_checkpoint = \
+                self._pending_checkpoint, None
+            pending.result()
 